@@ -0,0 +1,63 @@
+"""
+The pdfplumber and fast page backends side by side: time of extract_questions() with each
+on the same PDF, and a check that both return the same questions. Defaults to the
+production PDF; without it a synthetic one is generated.
+
+    python benchmarks/bench_backends.py prawo-pracy-poprawione-v2.pdf --repeat 3
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from extract_questions import BACKENDS, extract_questions  # noqa: E402
+from results import DEFAULT_OUTPUT, write_results  # noqa: E402
+from synthetic_pdf import write_pdf  # noqa: E402
+
+def measure(pdf_path, backend, repeat, workers):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        questions = extract_questions(pdf_path, workers=workers, backend=backend)
+        times.append(time.perf_counter() - start)
+    return times, questions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pdf", nargs="?", default=os.path.join(ROOT, "prawo-pracy-poprawione-v2.pdf"))
+    parser.add_argument("--synthetic-pages", type=int, default=50, help="size of the PDF generated when pdf is missing")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = args.pdf
+        if not os.path.exists(pdf_path):
+            pdf_path = os.path.join(tmp, "synthetic.pdf")
+            write_pdf(pdf_path, pages=args.synthetic_pages, highlight_fragments=2, noise_rects=5)
+            print(f"{args.pdf} not found, using a synthetic {args.synthetic_pages}-page PDF")
+
+        results = {"pdf": os.path.basename(pdf_path), "backends": {}}
+        outputs = {}
+        for backend in BACKENDS:
+            times, outputs[backend] = measure(pdf_path, backend, args.repeat, args.workers)
+            results["backends"][backend] = {
+                "best_s": round(min(times), 4),
+                "median_s": round(statistics.median(times), 4),
+                "questions": len(outputs[backend]),
+            }
+            print(f"{backend:>10}: best {min(times):7.3f} s, median {statistics.median(times):7.3f} s, "
+                  f"{len(outputs[backend])} questions")
+
+    results["identical"] = all(outputs[backend] == outputs[BACKENDS[0]] for backend in BACKENDS)
+    results["speedup"] = round(results["backends"]["pdfplumber"]["best_s"] / results["backends"]["fast"]["best_s"], 2)
+    print(f"same questions: {results['identical']}, fast backend {results['speedup']}x faster")
+    write_results(args.output, "backends", vars(args), results)
+    print(f"Results written to {args.output}")
+    if not results["identical"]:
+        sys.exit(1)
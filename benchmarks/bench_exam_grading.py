@@ -0,0 +1,91 @@
+"""
+Grading a whole exam sheet: every scoring rule of exam.py vectorized over bitmasks, against
+grading question by question with label sets the way the quiz screen checks one answer.
+Both must give the same scores; the sheets are synthetic, with 2-6 options per question.
+
+    python benchmarks/bench_exam_grading.py --questions 100 1000 10000 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from exam import SCORING_RULES, score_sheet  # noqa: E402
+from results import DEFAULT_OUTPUT, write_results  # noqa: E402
+
+def make_sheet(count, seed=0):
+    """(labels, correct, selected) per question, as label tuples and sets."""
+    rnd = random.Random(seed)
+    sheet = []
+    for _ in range(count):
+        labels = tuple("abcdef"[:rnd.randint(2, 6)])
+        correct = set(rnd.sample(labels, rnd.randint(1, len(labels) - 1)))
+        selected = set(rnd.sample(labels, rnd.randint(0, len(labels))))
+        sheet.append((labels, correct, selected))
+    return sheet
+
+def grade_per_question(sheet, rule):
+    scores = []
+    for labels, correct, selected in sheet:
+        if rule == "all_or_nothing":
+            scores.append(float(selected == correct))
+            continue
+        hits, misses = len(selected & correct), len(selected - correct)
+        share = hits / len(correct)
+        if rule == "proportional":
+            scores.append(share if not misses else 0.0)
+        else:
+            scores.append(min(1.0, max(0.0, share - misses / (len(labels) - len(correct)))))
+    return scores
+
+def encode(sheet):
+    def mask(labels, chosen):
+        return sum(1 << bit for bit, key in enumerate(labels) if key in chosen)
+    selected = np.array([mask(labels, s) for labels, _, s in sheet], dtype=np.int64)
+    correct = np.array([mask(labels, c) for labels, c, _ in sheet], dtype=np.int64)
+    options = np.array([(1 << len(labels)) - 1 for labels, _, _ in sheet], dtype=np.int64)
+    return selected, correct, options
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+    output = os.path.abspath(args.output)
+
+    results = {}
+    for count in args.questions:
+        sheet = make_sheet(count, args.seed)
+        encode_s, (selected, correct, options) = best_of(lambda: encode(sheet), args.repeat)
+        results[str(count)] = {"encode_ms": round(encode_s * 1000, 3)}
+        for rule in SCORING_RULES:
+            loop_s, expected = best_of(lambda: grade_per_question(sheet, rule), args.repeat)
+            vector_s, scores = best_of(lambda: score_sheet(selected, correct, options, rule), args.repeat)
+            if not np.allclose(scores, expected):
+                raise AssertionError(f"{rule}: vectorized scores differ from the per-question ones")
+            results[str(count)][rule] = {
+                "per_question_ms": round(loop_s * 1000, 3),
+                "vectorized_ms": round(vector_s * 1000, 3),
+                "speedup": round(loop_s / vector_s, 1),
+            }
+            print(f"{count:>7} questions, {rule:>14}: per question {loop_s * 1000:9.3f} ms, "
+                  f"vectorized {vector_s * 1000:8.3f} ms ({loop_s / vector_s:5.1f}x)")
+
+    params = {**vars(args), "output": output}
+    write_results(output, "exam_grading", params, results)
+    print(f"Results written to {output}")
@@ -0,0 +1,62 @@
+"""
+extract_questions() on synthetic PDFs of configurable size: every combination of page
+count, highlight fragments per correct option and worker count, best and median of a few
+runs each. The page cache is off, so every run parses every page.
+
+    python benchmarks/bench_extractor.py --pages 10 100 --highlights 1 4 --workers 1 4
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from extract_questions import extract_questions  # noqa: E402
+from results import DEFAULT_OUTPUT, write_results  # noqa: E402
+from synthetic_pdf import write_pdf  # noqa: E402
+
+def measure(pdf_path, workers, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        questions = extract_questions(pdf_path, workers=workers)
+        times.append(time.perf_counter() - start)
+    return times, len(questions)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--highlights", type=int, nargs="+", default=[1, 4],
+                        help="rectangles covering each correct option")
+    parser.add_argument("--noise", type=int, default=5, help="non-highlight rectangles per page")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            for fragments in args.highlights:
+                pdf_path = os.path.join(tmp, f"synthetic-{pages}-{fragments}.pdf")
+                write_pdf(pdf_path, pages=pages, highlight_fragments=fragments, noise_rects=args.noise)
+                for workers in args.workers:
+                    times, questions = measure(pdf_path, workers, args.repeat)
+                    best = min(times)
+                    runs.append({
+                        "pages": pages,
+                        "highlight_fragments": fragments,
+                        "workers": workers,
+                        "questions": questions,
+                        "best_s": round(best, 4),
+                        "median_s": round(statistics.median(times), 4),
+                        "pages_per_s": round(pages / best, 1),
+                    })
+                    print(f"{pages:5d} pages, {fragments:2d} rects/highlight, {workers:2d} workers: "
+                          f"best {best:7.3f} s, {pages / best:7.1f} pages/s, {questions} questions")
+
+    write_results(args.output, "extractor", vars(args), runs)
+    print(f"Results written to {args.output}")
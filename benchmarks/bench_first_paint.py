@@ -0,0 +1,156 @@
+"""
+Time to first meaningful paint of the quiz app in a headless browser, with and without
+access to the outside network.
+
+Starts `streamlit run` on a free port and opens the app in fresh browser contexts (cold
+cache) with Playwright. A paint counts as meaningful once the menu's start buttons are on
+screen and the page's fonts are settled, i.e. what a student sees is the styled menu.
+Offline, requests to any host but the app's are either refused right away ("refuse",
+like a machine without network) or left hanging ("stall", like a firewall dropping
+packets), which is where a stylesheet or font from a CDN holds up the first paint.
+
+    pip install playwright && playwright install chromium
+    python benchmarks/bench_first_paint.py --runs 5
+
+To compare with another version of the app, check it out and run again with another --name.
+"""
+import argparse
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+from urllib.request import urlopen
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+APP = os.path.abspath(os.path.join(ROOT, "streamlit_app.py"))
+sys.path.insert(0, ROOT)
+from results import DEFAULT_OUTPUT, latency_summary, write_results  # noqa: E402
+
+# Resolved once the menu is rendered and the fonts the page uses are loaded (or given up on);
+# rejected after `timeout` ms, a stalled request would otherwise keep it waiting for good
+_MEANINGFUL = """
+(timeout) => Promise.race([
+    (async () => {
+        while (![...document.querySelectorAll('button')].some(b => b.innerText.includes('Rozpocznij'))) {
+            await new Promise(requestAnimationFrame);
+        }
+        await document.fonts.ready;
+        await new Promise(requestAnimationFrame);
+        const paint = performance.getEntriesByName('first-contentful-paint')[0];
+        return {meaningful: performance.now(), fcp: paint ? paint.startTime : null};
+    })(),
+    new Promise((_, reject) => setTimeout(() => reject(new Error('no meaningful paint')), timeout)),
+])
+"""
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(app, workdir, port, timeout=60):
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", app, "--server.headless", "true",
+         "--server.port", str(port), "--server.enableStaticServing", "true",
+         "--browser.gatherUsageStats", "false"],
+        cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("streamlit did not start")
+
+def measure(browser, url, offline, nav_timeout):
+    """One cold load: (meaningful paint ms, FCP ms, external requests, bytes from the app's server)."""
+    context = browser.new_context()
+    app_host = urlsplit(url).netloc
+    external = []
+
+    def handle(route):
+        if urlsplit(route.request.url).netloc == app_host:
+            route.continue_()
+            return
+        external.append(route.request.url)
+        if offline == "refuse":
+            route.abort("internetdisconnected")
+        elif offline != "stall":
+            route.continue_()
+        # "stall": never answered, the request hangs until the browser gives up on it
+
+    context.route("**/*", handle)
+    page = context.new_page()
+    served = []
+    page.on("requestfinished", lambda request: served.append(request) if urlsplit(request.url).netloc == app_host else None)
+    try:
+        page.goto(url, wait_until="commit", timeout=nav_timeout)
+        timing = page.evaluate(_MEANINGFUL, nav_timeout)
+        app_bytes = sum(request.sizes()["responseBodySize"] for request in served)
+    finally:
+        context.close()
+    return timing["meaningful"], timing["fcp"], len(external), app_bytes
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="cold loads per network mode")
+    parser.add_argument("--offline", choices=("refuse", "stall"), default="stall",
+                        help="what happens to external requests without network (default: stall)")
+    parser.add_argument("--app", default=APP)
+    parser.add_argument("--bank", default=os.path.join(ROOT, "baza_pytan.json"))
+    parser.add_argument("--timeout", type=float, default=60, help="seconds per page load")
+    parser.add_argument("--name", default="first_paint")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+    output = os.path.abspath(args.output)
+
+    try:
+        from playwright.sync_api import sync_playwright
+    except ImportError:
+        sys.exit("This benchmark needs Playwright: pip install playwright && playwright install chromium")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        # The app reads its bank and writes progress.db relative to the working directory
+        shutil.copy(args.bank, os.path.join(tmp, "baza_pytan.json"))
+        shutil.copytree(os.path.join(ROOT, ".streamlit"), os.path.join(tmp, ".streamlit"))
+        port = _free_port()
+        server = start_server(os.path.abspath(args.app), tmp, port)
+        url = f"http://127.0.0.1:{port}/"
+        try:
+            with sync_playwright() as p:
+                browser = p.chromium.launch()
+                # Warm-up: the first session loads the bank and builds the caches server-side
+                measure(browser, url, None, args.timeout * 1000)
+                for mode in ("online", args.offline):
+                    meaningful, fcp, external, app_bytes = [], [], 0, 0
+                    for _ in range(args.runs):
+                        m, f, e, b = measure(browser, url, None if mode == "online" else mode, args.timeout * 1000)
+                        meaningful.append(m / 1000)
+                        if f is not None:
+                            fcp.append(f / 1000)
+                        external, app_bytes = e, b
+                    results[mode] = {
+                        "meaningful_paint": latency_summary(meaningful),
+                        "first_contentful_paint": latency_summary(fcp) if fcp else None,
+                        "external_requests": external,
+                        "app_bytes": app_bytes,
+                    }
+                    print(f"{mode:>7}: meaningful paint p50 {results[mode]['meaningful_paint']['p50_ms']:.0f} ms, "
+                          f"max {results[mode]['meaningful_paint']['max_ms']:.0f} ms, "
+                          f"{external} external requests, {app_bytes / 1024:.0f} KiB from the app")
+                browser.close()
+        finally:
+            server.terminate()
+            server.wait()
+
+    params = {**vars(args), "output": output}
+    write_results(output, args.name, params, results)
+    print(f"Results written to {output}")
@@ -0,0 +1,83 @@
+"""
+Near-duplicate detection on synthetic banks of growing size. A tenth of the questions get a
+perturbed copy (punctuation and case, reordered options, one changed word, a different
+answer); reports the time per bank size, the share of copies found and the conflicts flagged.
+
+    python benchmarks/bench_near_duplicates.py --questions 10000 40000 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from bench_question_bank import synthetic_bank  # noqa: E402
+from near_duplicates import find_near_duplicates, has_conflict  # noqa: E402
+from results import DEFAULT_OUTPUT, write_results  # noqa: E402
+
+KINDS = ("punctuation", "reordered", "changed_word", "other_answer")
+
+def perturbed_bank(n, seed=0):
+    rnd = random.Random(seed)
+    originals = list(synthetic_bank(n, seed))
+    bank = list(originals)
+    copies = {}
+    for i, q in enumerate(originals[:n // 10]):
+        kind = KINDS[i % len(KINDS)]
+        labels = list(q["options"])
+        if kind == "punctuation":
+            copy = {**q, "text": q["text"].upper().rstrip(":") + "?",
+                    "options": {label: text + "." for label, text in q["options"].items()}}
+        elif kind == "reordered":
+            texts = [q["options"][label] for label in labels]
+            order = rnd.sample(range(len(labels)), len(labels))
+            copy = {**q, "options": {label: texts[k] for label, k in zip(labels, order)},
+                    "correct_answers": sorted(label for label, k in zip(labels, order) if labels[k] in q["correct_answers"])}
+        elif kind == "changed_word":
+            words = q["text"].split()
+            words[len(words) // 2] = "zmienione"
+            copy = {**q, "text": " ".join(words)}
+        else:
+            copy = {**q, "correct_answers": [label for label in labels if label not in q["correct_answers"]][:1]}
+        copy["id"] = n + i + 1
+        bank.append(copy)
+        copies[len(bank) - 1] = (i, kind)
+    return bank, copies
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, nargs="+", default=[10000, 40000])
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    runs = []
+    for n in args.questions:
+        bank, copies = perturbed_bank(n)
+        start = time.perf_counter()
+        clusters = find_near_duplicates(bank)
+        elapsed = time.perf_counter() - start
+
+        cluster_of = {member: k for k, cluster in enumerate(clusters) for member in cluster}
+        found = {kind: 0 for kind in KINDS}
+        flagged = {kind: 0 for kind in KINDS}
+        for copy, (original, kind) in copies.items():
+            if copy in cluster_of and cluster_of.get(original) == cluster_of[copy]:
+                found[kind] += 1
+                flagged[kind] += has_conflict(bank, clusters[cluster_of[copy]])
+        per_kind = len(copies) // len(KINDS)
+        runs.append({
+            "questions": len(bank),
+            "seconds": round(elapsed, 3),
+            "us_per_question": round(elapsed / len(bank) * 1e6, 1),
+            "clusters": len(clusters),
+            "recall": {kind: round(found[kind] / per_kind, 3) for kind in KINDS},
+            "conflicts_flagged": flagged,
+        })
+        print(f"{len(bank):7d} questions: {elapsed:6.2f} s ({elapsed / len(bank) * 1e6:5.0f} us/question), "
+              f"recall " + ", ".join(f"{kind} {found[kind] / per_kind:.0%}" for kind in KINDS)
+              + f", conflicts flagged {flagged['other_answer']}/{per_kind}")
+
+    write_results(args.output, "near_duplicates", vars(args), runs)
+    print(f"Results written to {args.output}")
@@ -0,0 +1,86 @@
+"""
+Micro-benchmark: line reconstruction and highlight detection on a dense synthetic page,
+the previous per-word Python loops against the NumPy-backed PageModel.
+
+    python benchmarks/bench_page_model.py --lines 400 --rects 800
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from extract_questions import HighlightIndex, PageModel  # noqa: E402
+
+# Per-rect color check as it was before highlight_color_mask
+def _loop_is_highlight_color(color):
+    if not color or isinstance(color, (int, float)):
+        return False
+    if len(color) == 3:
+        r, g, b = color
+        return ((r < 0.2 and g > 0.8 and b < 0.2) or (r > 0.8 and g > 0.8 and b < 0.2)
+                or (g > 0.8 and r < 0.9 and b < 0.9) or (r > 0.8 and g > 0.8 and b < 0.6))
+    if len(color) == 4:
+        return color[2] > 0.8 and color[3] < 0.2
+    return False
+
+def loop_lines(words, rects):
+    highlights = [rect for rect in rects
+                  if _loop_is_highlight_color(rect.get("non_stroking_color"))
+                  or _loop_is_highlight_color(rect.get("stroking_color"))]
+    index = HighlightIndex(highlights)
+    lines = []
+    current_line = [words[0]]
+    for word in words[1:]:
+        if abs(word['top'] - current_line[-1]['top']) < 5:
+            current_line.append(word)
+        else:
+            lines.append(current_line)
+            current_line = [word]
+    lines.append(current_line)
+    result = []
+    for line in lines:
+        text = " ".join([w['text'] for w in line]).strip()
+        x0 = min([w['x0'] for w in line])
+        top = min([w['top'] for w in line])
+        x1 = max([w['x1'] for w in line])
+        bottom = max([w['bottom'] for w in line])
+        result.append((text, index.overlaps((x0, top, x1, bottom))))
+    return result
+
+def model_lines(words, rects):
+    return PageModel(words, rects).lines()
+
+def synthetic_page(n_lines, n_rects, words_per_line=6, seed=0):
+    rnd = random.Random(seed)
+    words = []
+    for i in range(n_lines):
+        top = 40 + i * 12.0
+        x = 50.0
+        for j in range(words_per_line):
+            width = rnd.uniform(10, 60)
+            words.append({"text": f"w{i}_{j}", "x0": x, "x1": x + width, "top": top + rnd.uniform(0, 1), "bottom": top + 10})
+            x += width + 3
+    colors = [(1, 1, 0), (0.5, 1, 0.5), (0.9, 0.9, 0.9), (0, 0, 1, 0), (0, 0, 0), None]
+    rects = []
+    for _ in range(n_rects):
+        top = rnd.uniform(40, 40 + n_lines * 12.0)
+        x0 = rnd.uniform(40, 400)
+        rects.append({"x0": x0, "x1": x0 + rnd.uniform(2, 30), "top": top, "bottom": top + rnd.uniform(2, 12),
+                      "non_stroking_color": rnd.choice(colors), "stroking_color": rnd.choice(colors)})
+    return words, rects
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=400)
+    parser.add_argument("--rects", type=int, default=800)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    words, rects = synthetic_page(args.lines, args.rects)
+    assert loop_lines(words, rects) == model_lines(words, rects), "PageModel output differs from the loop version"
+
+    for name, fn in (("loop", loop_lines), ("numpy", model_lines)):
+        best = min(timeit.repeat(lambda: fn(words, rects), number=1, repeat=args.repeat))
+        print(f"{name:>6}: {best * 1000:8.2f} ms per page ({len(words)} words, {len(rects)} rects)")
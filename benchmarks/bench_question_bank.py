@@ -0,0 +1,85 @@
+"""
+Load time and resident memory of a synthetic question bank: json.load of the
+pretty-printed JSON against opening the .qbank file and decoding a few questions.
+Each variant runs in a fresh interpreter so peak RSS isn't shared between them.
+
+    python benchmarks/bench_question_bank.py --questions 100000
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from question_bank import QuestionBank, write_bank  # noqa: E402
+
+def synthetic_bank(n, seed=0):
+    rnd = random.Random(seed)
+    words = "postępowanie sąd wyrok pozew zażalenie apelacja strona termin kodeks pracownik umowa".split()
+    for i in range(1, n + 1):
+        options = {label: " ".join(rnd.choices(words, k=rnd.randint(3, 12))) for label in "abcd"}
+        yield {
+            "id": i,
+            "text": " ".join(rnd.choices(words, k=rnd.randint(6, 20))) + ":",
+            "options": options,
+            "correct_answers": sorted(rnd.sample("abcd", rnd.randint(1, 2))),
+        }
+
+def _max_rss_kb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def run_variant(kind, path, touches):
+    baseline = _max_rss_kb()
+    start = time.perf_counter()
+    if kind == "json":
+        with open(path, "r", encoding='utf-8') as f:
+            bank = json.load(f)
+    else:
+        bank = QuestionBank(path)
+    loaded = time.perf_counter()
+    rnd = random.Random(1)
+    for _ in range(touches):
+        bank[rnd.randrange(len(bank))]
+    done = time.perf_counter()
+    print(json.dumps({
+        "kind": kind,
+        "load_ms": (loaded - start) * 1000,
+        "access_ms": (done - loaded) * 1000,
+        "rss_delta_mb": (_max_rss_kb() - baseline) / 1024,
+    }))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, default=100_000)
+    parser.add_argument("--touches", type=int, default=20, help="questions read after loading")
+    parser.add_argument("--variant", nargs=2, metavar=("KIND", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        run_variant(args.variant[0], args.variant[1], args.touches)
+        sys.exit()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "bank.json")
+        bank_path = os.path.join(tmp, "bank.qbank")
+        with open(json_path, "w", encoding='utf-8') as f:
+            json.dump(list(synthetic_bank(args.questions)), f, indent=2, ensure_ascii=False)
+        write_bank(synthetic_bank(args.questions), bank_path)
+
+        print(f"{args.questions} questions: JSON {os.path.getsize(json_path) / 2**20:.1f} MB, "
+              f"qbank {os.path.getsize(bank_path) / 2**20:.1f} MB")
+        for kind, path in (("json", json_path), ("qbank", bank_path)):
+            out = subprocess.run(
+                [sys.executable, __file__, "--touches", str(args.touches), "--variant", kind, path],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            r = json.loads(out)
+            print(f"{kind:>6}: load {r['load_ms']:8.1f} ms, {args.touches} reads {r['access_ms']:6.2f} ms, "
+                  f"peak RSS +{r['rss_delta_mb']:.1f} MB")
@@ -0,0 +1,71 @@
+"""
+Server time and payload per option click on the question screen: a full-script rerun
+(what every click cost before the answer area became a fragment) against a rerun
+scoped to the answer fragment.
+
+AppTest always reruns the whole script, so the fragment id is injected into the rerun
+request and the size of the ForwardMsgs produced by each run is recorded.
+
+    python benchmarks/bench_question_reruns.py --clicks 50
+"""
+import argparse
+import os
+import statistics
+import time
+
+import streamlit.testing.v1.local_script_runner as local_script_runner
+from streamlit.testing.v1 import AppTest
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "streamlit_app.py")
+
+_scope = {"fragment_id": None}
+_payloads = []
+
+_RerunData = local_script_runner.RerunData
+_parse_tree = local_script_runner.parse_tree_from_messages
+
+def _rerun_data(**kwargs):
+    if _scope["fragment_id"]:
+        kwargs["fragment_id_queue"] = [_scope["fragment_id"]]
+    return _RerunData(**kwargs)
+
+def _parse_tree_recording(messages):
+    _payloads.append((len(messages), sum(m.ByteSize() for m in messages)))
+    return _parse_tree(messages)
+
+local_script_runner.RerunData = _rerun_data
+local_script_runner.parse_tree_from_messages = _parse_tree_recording
+
+def measure_clicks(at, clicks, fragment_id):
+    _scope["fragment_id"] = fragment_id
+    times, sizes, messages = [], [], []
+    for n in range(clicks):
+        box = at.checkbox[n % len(at.checkbox)]
+        box.set_value(not box.value)
+        start = time.perf_counter()
+        at.run()
+        times.append(time.perf_counter() - start)
+        messages.append(_payloads[-1][0])
+        sizes.append(_payloads[-1][1])
+        assert not at.exception, at.exception
+    _scope["fragment_id"] = None
+    return times, messages, sizes
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clicks", type=int, default=50)
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(APP))
+    at = AppTest.from_file(os.path.abspath(APP), default_timeout=30).run()
+    next(b for b in at.button if b.label.startswith("Rozpocznij Pełny")).click()
+    at.run()
+    fragment_ids = list(at._fragment_storage._fragments)
+
+    results = {"full rerun": measure_clicks(at, args.clicks, None)}
+    if fragment_ids:
+        results["fragment"] = measure_clicks(at, args.clicks, fragment_ids[0])
+
+    for name, (times, messages, sizes) in results.items():
+        print(f"{name:>10}: median {statistics.median(times) * 1000:6.1f} ms, "
+              f"{statistics.median(messages):4.0f} messages, {statistics.median(sizes) / 1024:6.1f} KiB per click")
@@ -0,0 +1,94 @@
+"""
+Answer log and per-question statistics as the log grows: the cost of logging answers,
+of compacting the log (everything at once, and a small tail as the background flusher
+sees it) and of the instructor view's reads, which should stay flat.
+
+    python benchmarks/bench_question_stats.py --answers 10000 100000 1000000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from progress_store import ProgressStore  # noqa: E402
+from results import DEFAULT_OUTPUT, latency_summary, write_results  # noqa: E402
+
+LABELS = "abcd"
+
+def answer_rows(count, questions, users, seed=0, start=0.0):
+    rnd = random.Random(seed)
+    for n in range(count):
+        correct = rnd.random() < 0.7
+        selected = sorted(rnd.sample(LABELS, rnd.randint(1, 2)))
+        yield (f"user-{rnd.randrange(users)}", json.dumps(rnd.randrange(questions)), int(correct),
+               start + n, json.dumps(selected))
+
+def populate(store, rows):
+    with store._conn:
+        store._conn.executemany(
+            "INSERT INTO answers (user_id, question_id, correct, answered_at, selected) VALUES (?, ?, ?, ?, ?)", rows
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--answers", type=int, nargs="+", default=[10000, 100000, 1000000],
+                        help="log sizes to measure")
+    parser.add_argument("--questions", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--tail", type=int, default=1000, help="answers logged between two compactions")
+    parser.add_argument("--top", type=int, default=20, help="rows of the instructor view")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+    output = os.path.abspath(args.output)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.answers:
+            # No background compaction while measuring
+            store = ProgressStore(os.path.join(tmp, f"stats-{size}.db"), stats_interval=float("inf"))
+
+            # Logging through the store: buffered, one transaction per batch
+            rnd = random.Random(size)
+            start = time.perf_counter()
+            for n in range(args.tail):
+                store.record_answer(f"user-{n % args.users}", rnd.randrange(args.questions), rnd.random() < 0.7,
+                                    rnd.sample(LABELS, 1))
+            store.flush()
+            record_us = (time.perf_counter() - start) / args.tail * 1e6
+
+            populate(store, answer_rows(size - args.tail, args.questions, args.users, seed=size))
+            start = time.perf_counter()
+            store.compact_stats()
+            full_s = time.perf_counter() - start
+
+            # A tail of new answers, as compacted on the flusher's schedule
+            populate(store, answer_rows(args.tail, args.questions, args.users, seed=size + 1, start=size))
+            start = time.perf_counter()
+            store.compact_stats()
+            tail_s = time.perf_counter() - start
+
+            view = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                store.stats_overview()
+                store.hardest_questions(args.top)
+                view.append(time.perf_counter() - start)
+
+            results[str(size)] = {
+                "record_answer_us": round(record_us, 2),
+                "compact_full_s": round(full_s, 3),
+                "compact_tail_ms": round(tail_s * 1000, 3),
+                "view": latency_summary(view),
+            }
+            print(f"{size:>9} answers: record_answer {record_us:6.1f} us, compact all {full_s:7.3f} s, "
+                  f"compact {args.tail} new {tail_s * 1000:7.1f} ms, view p50 {results[str(size)]['view']['p50_ms']:.3f} ms")
+
+    params = {**vars(args), "output": output}
+    write_results(output, "question_stats", params, results)
+    print(f"Results written to {output}")
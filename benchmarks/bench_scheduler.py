@@ -0,0 +1,83 @@
+"""
+"Due today" at scale: one user with a large answered set among many other users.
+Times the indexed due query, building the session's DueQueue and taking the next N
+due questions from the heap, against a full scan that sorts every answered question.
+
+    python benchmarks/bench_scheduler.py --questions 50000 --users 2000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from progress_store import ProgressStore  # noqa: E402
+from results import DEFAULT_OUTPUT, write_results  # noqa: E402
+from scheduler import DAY, LEITNER_INTERVALS, DueQueue, end_of_day  # noqa: E402
+
+def populate(store, users, per_user, questions, now, seed=0):
+    rnd = random.Random(seed)
+    def rows():
+        for user in range(users):
+            count = questions if user == 0 else per_user
+            for question_id in rnd.sample(range(questions), count):
+                box = rnd.randrange(len(LEITNER_INTERVALS))
+                # Due times spread over the box's interval around today
+                due_at = now + (rnd.random() - 0.5) * max(LEITNER_INTERVALS[box], 1) * DAY
+                yield f"user-{user}", json.dumps(question_id), box, due_at
+    with store._conn:
+        store._conn.executemany("INSERT INTO schedule VALUES (?, ?, ?, ?)", rows())
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, default=50000, help="answered questions of the measured user")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--per-user", type=int, default=200, help="answered questions of every other user")
+    parser.add_argument("--take", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    now = time.time()
+    until = end_of_day(now)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ProgressStore(os.path.join(tmp, "progress.db"))
+        populate(store, args.users, args.per_user, args.questions, now)
+
+        query_s, due = timed(lambda: store.due_questions("user-0", until), args.repeat)
+        build_s, queue = timed(lambda: DueQueue(until, due), args.repeat)
+        take_s, _ = timed(lambda: queue.next_due(args.take), args.repeat)
+
+        def full_scan():
+            rows = store._conn.execute(
+                "SELECT question_id, due_at FROM schedule WHERE user_id = ?", ("user-0",)
+            ).fetchall()
+            return sorted((due_at, json.loads(question_id)) for question_id, due_at in rows if due_at < until)[:args.take]
+        scan_s, _ = timed(full_scan, args.repeat)
+
+        results = {
+            "due_today": len(due),
+            "due_query_ms": round(query_s * 1000, 3),
+            "queue_build_ms": round(build_s * 1000, 3),
+            "next_due_us": round(take_s * 1e6, 1),
+            "full_scan_ms": round(scan_s * 1000, 3),
+        }
+    print(f"{len(due)} of {args.questions} questions due today ({args.users} users in the store)")
+    print(f"  due query {results['due_query_ms']:.1f} ms, queue build {results['queue_build_ms']:.1f} ms "
+          f"(once per session and day)")
+    print(f"  next {args.take} due from the heap: {results['next_due_us']:.0f} us, "
+          f"full scan and sort: {results['full_scan_ms']:.1f} ms")
+    write_results(args.output, "scheduler", vars(args), results)
+    print(f"Results written to {args.output}")
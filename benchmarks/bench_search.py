@@ -0,0 +1,54 @@
+"""
+Full-text search on a synthetic bank: building the inverted index once, then query
+latency against a linear scan that normalizes every question on each query.
+
+    python benchmarks/bench_search.py --questions 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from bench_question_bank import synthetic_bank  # noqa: E402
+from results import DEFAULT_OUTPUT, write_results  # noqa: E402
+from search_index import SearchIndex, terms  # noqa: E402
+
+QUERIES = ["zażalenie", "zażaleniu apelacji", "sąd wyrok termin", "pracownika umowy", "zaża", "kasacja"]
+
+def linear_scan(texts, query):
+    wanted = set(terms(query))
+    return [n for n, text in enumerate(texts) if wanted <= set(terms(text))]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    texts = [" ".join([q["text"], *q["options"].values()]) for q in synthetic_bank(args.questions)]
+    start = time.perf_counter()
+    index = SearchIndex(texts)
+    build_s = time.perf_counter() - start
+    print(f"index of {args.questions} questions built in {build_s:.2f} s")
+
+    queries = []
+    for query in QUERIES:
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            found = index.search(query)
+            best = min(best, time.perf_counter() - start)
+        start = time.perf_counter()
+        scanned = linear_scan(texts, query)
+        scan_s = time.perf_counter() - start
+        # The prefix fallback matches more than whole stems, the scan only whole ones
+        assert set(scanned) <= set(found), query
+        queries.append({"query": query, "matches": len(found), "index_ms": round(best * 1000, 3),
+                        "scan_ms": round(scan_s * 1000, 1)})
+        print(f"{query!r:>24}: {len(found):6d} matches, index {best * 1000:7.2f} ms, scan {scan_s * 1000:8.1f} ms")
+
+    write_results(args.output, "search", vars(args), {"build_s": round(build_s, 3), "queries": queries})
+    print(f"Results written to {args.output}")
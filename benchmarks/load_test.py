@@ -0,0 +1,151 @@
+"""
+Headless load test of the quiz app: N simulated students, each going menu -> start quiz
+-> tick an option, check and move on for every question -> summary, with the rerun
+latency of every step and the memory each session adds to the server process.
+
+Sessions are spread over worker processes; inside a process they advance one rerun at
+a time in round-robin, so they share the cached bank and progress store the way
+concurrent browser sessions share one Streamlit server. AppTest always reruns the
+whole script, also for clicks a real server scopes to the answer fragment.
+
+    python benchmarks/load_test.py --sessions 20 --processes 4 --questions 10
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+APP = os.path.abspath(os.path.join(ROOT, "streamlit_app.py"))
+sys.path.insert(0, ROOT)
+from results import DEFAULT_OUTPUT, latency_summary, write_results  # noqa: E402
+
+def _rss_kb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        # No procfs: fall back to the peak, which still grows with the sessions
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def _button(at, prefix):
+    return next(b for b in at.button if b.label.startswith(prefix))
+
+def _check(at):
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+def student(at, user_id, questions, seed, timings):
+    """One session as a generator: every next() performs one rerun and records its latency."""
+    rnd = random.Random(seed)
+
+    def run(kind):
+        start = time.perf_counter()
+        at.run()
+        timings.setdefault(kind, []).append(time.perf_counter() - start)
+        _check(at)
+
+    at.query_params["u"] = user_id
+    run("menu")
+    yield
+    if questions:
+        at.number_input[0].set_value(questions)
+        _button(at, "Start Losowy").click()
+    else:
+        _button(at, "Rozpocznij Pełny").click()
+    run("start_quiz")
+    yield
+    while at.checkbox:
+        rnd.choice(at.checkbox).check()
+        run("tick")
+        yield
+        _button(at, "Sprawdź").click()
+        run("check")
+        yield
+        _button(at, "Następne").click()
+        run("next")
+        yield
+    if not at.metric:
+        raise RuntimeError(f"session {user_id} did not reach the summary screen")
+
+def run_worker(worker, sessions, questions, seed):
+    from streamlit.testing.v1 import AppTest
+
+    # Bare-mode warnings from the cached resources, one per session and not about the app
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).setLevel(logging.ERROR)
+    # Warm-up session: loads the bank and opens the store, which every later session shares
+    AppTest.from_file(APP, default_timeout=60).run()
+    baseline_kb = _rss_kb()
+
+    timings = {}
+    apps = [AppTest.from_file(APP, default_timeout=60) for _ in range(sessions)]
+    active = [
+        student(at, f"load-{worker}-{n}", questions, seed + worker * 1000 + n, timings)
+        for n, at in enumerate(apps)
+    ]
+    start = time.perf_counter()
+    while active:
+        for session in list(active):
+            try:
+                next(session)
+            except StopIteration:
+                active.remove(session)
+    elapsed = time.perf_counter() - start
+    # All sessions are still alive at this point, so the growth is what they hold
+    return timings, (_rss_kb() - baseline_kb) / sessions, elapsed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--processes", type=int, default=2)
+    parser.add_argument("--questions", type=int, default=10,
+                        help="questions per session, 0 for the full quiz")
+    parser.add_argument("--bank", default=os.path.join(ROOT, "baza_pytan.json"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+    output = os.path.abspath(args.output)
+
+    processes = max(1, min(args.processes, args.sessions))
+    split = [args.sessions // processes + (n < args.sessions % processes) for n in range(processes)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # The app reads its bank and writes progress.db relative to the working directory
+        shutil.copy(args.bank, os.path.join(tmp, "baza_pytan.json"))
+        os.chdir(tmp)
+        ctx = multiprocessing.get_context("spawn")
+        with ctx.Pool(processes) as pool:
+            outcomes = pool.starmap(
+                run_worker, [(n, count, args.questions, args.seed) for n, count in enumerate(split)]
+            )
+
+    timings = {}
+    for worker_timings, _, _ in outcomes:
+        for kind, values in worker_timings.items():
+            timings.setdefault(kind, []).extend(values)
+    every_rerun = [t for values in timings.values() for t in values]
+    memory = [kb for _, kb, _ in outcomes]
+
+    results = {
+        "reruns": latency_summary(every_rerun),
+        "by_step": {kind: latency_summary(values) for kind, values in timings.items()},
+        "rss_kib_per_session": round(sum(kb * n for kb, n in zip(memory, split)) / args.sessions, 1),
+        "wall_s": round(max(elapsed for _, _, elapsed in outcomes), 3),
+    }
+    print(f"{args.sessions} sessions in {processes} processes, {results['reruns']['count']} reruns: "
+          f"p50 {results['reruns']['p50_ms']:.1f} ms, p95 {results['reruns']['p95_ms']:.1f} ms")
+    for kind, summary in results["by_step"].items():
+        print(f"  {kind:>10}: p50 {summary['p50_ms']:7.1f} ms, p95 {summary['p95_ms']:7.1f} ms ({summary['count']})")
+    print(f"  memory per session: {results['rss_kib_per_session']:.0f} KiB")
+
+    params = {**vars(args), "output": output}
+    write_results(output, "load_test", params, results)
+    print(f"Results written to {output}")
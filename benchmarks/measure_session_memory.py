@@ -0,0 +1,77 @@
+"""
+Memory held per Streamlit session, before and after moving the bank into one shared object.
+
+before: every session gets its own deserialized copy of the bank (what st.cache_data hands
+        out), a questions_to_ask list of question dicts and a set of incorrect ids
+after:  the bank is shared; a session keeps an array('I') of bank positions, a cursor and
+        a bitmap of wrong answers
+
+    python benchmarks/measure_session_memory.py --sessions 300 --questions 226
+    python benchmarks/measure_session_memory.py --bank baza_pytan.json --sessions 300
+"""
+import argparse
+import json
+import os
+import pickle
+import random
+import sys
+import tracemalloc
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_question_bank import synthetic_bank  # noqa: E402
+
+def session_before(bank, rnd, wrong_ratio):
+    # st.cache_data returns a fresh copy of the cached value to every caller
+    data = pickle.loads(pickle.dumps(bank))
+    questions_to_ask = data[:]
+    rnd.shuffle(questions_to_ask)
+    return {
+        "questions_to_ask": questions_to_ask,
+        "quiz_logic_ref": data,
+        "incorrect_ids": {q["id"] for q in data if rnd.random() < wrong_ratio},
+        "current_question_index": 0,
+    }
+
+def session_after(bank, rnd, wrong_ratio):
+    order = list(range(len(bank)))
+    rnd.shuffle(order)
+    bitmap = bytearray((len(bank) + 7) // 8)
+    for n in range(len(bank)):
+        if rnd.random() < wrong_ratio:
+            bitmap[n >> 3] |= 1 << (n & 7)
+    return {
+        "question_order": array('I', order),
+        "incorrect_bitmap": bitmap,
+        "current_question_index": 0,
+    }
+
+def measure(make_session, bank, sessions, wrong_ratio):
+    rnd = random.Random(0)
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    kept = [make_session(bank, rnd, wrong_ratio) for _ in range(sessions)]
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return (end - start) / sessions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bank", help="JSON bank to use instead of a synthetic one")
+    parser.add_argument("--questions", type=int, default=226, help="size of the synthetic bank")
+    parser.add_argument("--sessions", type=int, default=300)
+    parser.add_argument("--wrong-ratio", type=float, default=0.2, help="share of questions in the review set")
+    args = parser.parse_args()
+
+    if args.bank:
+        with open(args.bank, "r", encoding='utf-8') as f:
+            bank = json.load(f)
+    else:
+        bank = list(synthetic_bank(args.questions))
+
+    before = measure(session_before, bank, args.sessions, args.wrong_ratio)
+    after = measure(session_after, bank, args.sessions, args.wrong_ratio)
+    print(f"{len(bank)} questions, {args.sessions} sessions (full quiz, {args.wrong_ratio:.0%} in review)")
+    print(f"before: {before / 1024:10.1f} KiB per session, {before * args.sessions / 2**20:8.1f} MiB total")
+    print(f" after: {after / 1024:10.1f} KiB per session, {after * args.sessions / 2**20:8.1f} MiB total")
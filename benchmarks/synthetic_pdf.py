@@ -0,0 +1,87 @@
+"""
+Minimal PDF writer for benchmarks: exam-style pages with numbered questions, a)-d) options
+and highlight rectangles behind the correct ones, split into a configurable number of
+fragments the way annotated PDFs often are, plus grey boxes the extractor has to skip.
+No dependencies beyond the stdlib.
+"""
+import itertools
+import random
+import zlib
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+LINE_HEIGHT = 14
+COLORS = ((1, 1, 0), (0.5, 1, 0.5), (0, 1, 0))
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def _lines(seed):
+    rnd = random.Random(seed)
+    for number in itertools.count(1):
+        yield f"{number}. Question {number} about the procedure, long enough to look real:", False
+        if rnd.random() < 0.3:
+            yield "continuation of the question text", False
+        correct = set(rnd.sample("abcd", rnd.randint(1, 2)))
+        for label in "abcd":
+            yield f"{label}) option {label} of question {number}", label in correct
+            if rnd.random() < 0.15:
+                yield "continuation of the option", False
+
+def _page_streams(pages, highlight_fragments, noise_rects, seed):
+    rnd = random.Random(seed + 1)
+    lines = _lines(seed)
+    for _ in range(pages):
+        ops = []
+        for _ in range(noise_rects):
+            ops.append(f"0.9 0.9 0.9 rg {rnd.randint(0, 500)} {rnd.randint(0, 800)} 40 20 re f")
+        y = PAGE_HEIGHT - 50
+        while y >= 50:
+            text, highlighted = next(lines)
+            if highlighted:
+                r, g, b = rnd.choice(COLORS)
+                width = 300 / highlight_fragments
+                for k in range(highlight_fragments):
+                    ops.append(f"{r} {g} {b} rg {50 + k * width:.2f} {y - 3} {width - 0.5:.2f} 12 re f")
+            ops.append(f"0 0 0 rg BT /F1 10 Tf 50 {y} Td ({_escape(text)}) Tj ET")
+            y -= LINE_HEIGHT
+        yield "\n".join(ops).encode("latin-1")
+
+def write_pdf(path, pages=10, highlight_fragments=1, noise_rects=0, seed=0):
+    """
+    Write a PDF with the given number of pages. Every correct option is covered by
+    highlight_fragments rectangles; noise_rects grey boxes are scattered over each page.
+    """
+    streams = list(_page_streams(pages, highlight_fragments, noise_rects, seed))
+    # Object numbers: 1 catalog, 2 pages, 3 font, then (page, content) pairs
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    kids = []
+    for n, data in enumerate(streams):
+        page_obj, content_obj = 4 + 2 * n, 5 + 2 * n
+        kids.append(f"{page_obj} 0 R")
+        objects[page_obj] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_obj} 0 R >>"
+        ).encode()
+        compressed = zlib.compress(data)
+        objects[content_obj] = (
+            f"<< /Length {len(compressed)} /Filter /FlateDecode >>\nstream\n".encode()
+            + compressed + b"\nendstream"
+        )
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = len(out)
+        out += f"{number} 0 obj\n".encode() + objects[number] + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for number in sorted(objects):
+        out += f"{offsets[number]:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+
+    with open(path, "wb") as f:
+        f.write(out)
@@ -0,0 +1,92 @@
+"""
+Exam sheets graded in one pass.
+
+A question's answer is a bitmask over its options, bit i for the i-th label in sorted order
+(the same encoding as QuizLogic.selection_mask), so a whole sheet is three small integer
+arrays - options ticked, correct options and options the question has - and every scoring
+rule below is a handful of numpy operations over the sheet, whatever its length.
+"""
+import numpy as np
+
+# Rule name -> description. Every rule gives each question a score between 0 and 1.
+SCORING_RULES = {
+    # Exactly the correct options ticked
+    "all_or_nothing": "1 point for exactly the correct options, 0 otherwise",
+    # Share of the correct options ticked, nothing if any wrong option is ticked
+    "proportional": "k/n of a point for k of n correct options, 0 if a wrong option is ticked",
+    # Every correct option ticked adds 1/n, every wrong one takes 1/(number of wrong options)
+    "penalized": "+1/n per correct option ticked, -1/m per wrong one (m wrong options), at least 0",
+}
+DEFAULT_RULE = "all_or_nothing"
+
+# Policy name -> description, for a sheet handed in more than LATE_GRACE seconds after its deadline.
+# A sheet handed in within the grace period (a slow connection, a click at the last second) is on time.
+LATE_POLICIES = {
+    "zero": "the sheet scores 0 points; its answers are logged, marked late",
+    "reject": "the sheet isn't graded and its answers aren't logged",
+}
+DEFAULT_LATE_POLICY = "zero"
+LATE_GRACE = 30
+
+# Set bits of every byte value; wider masks are summed byte by byte
+_POPCOUNT8 = np.array([bin(n).count("1") for n in range(256)], dtype=np.uint8)
+
+def popcount(masks):
+    """Number of set bits of every element of a uint32 array."""
+    masks = np.asarray(masks, dtype=np.uint32)
+    if hasattr(np, "bitwise_count"):
+        # numpy >= 2.0, a single pass
+        return np.bitwise_count(masks).astype(np.int32)
+    return (
+        _POPCOUNT8[masks & 0xFF].astype(np.int32)
+        + _POPCOUNT8[(masks >> 8) & 0xFF]
+        + _POPCOUNT8[(masks >> 16) & 0xFF]
+        + _POPCOUNT8[masks >> 24]
+    )
+
+def score_sheet(selected, correct, options, rule=DEFAULT_RULE):
+    """
+    Score of every question of a sheet, a float array in [0, 1].
+
+    selected, correct and options are equal-length integer arrays of bitmasks: the options
+    ticked, the correct options and all options of each question. A question whose correct
+    answer can't be expressed over its options (correct < 0) scores 0 under every rule.
+    """
+    if rule not in SCORING_RULES:
+        raise ValueError(f"Unknown scoring rule: {rule!r} (expected one of {', '.join(SCORING_RULES)})")
+    options = np.asarray(options, dtype=np.int64)
+    # Ticks outside the question's options (none in practice) don't count
+    selected = np.asarray(selected, dtype=np.int64) & options
+    correct = np.asarray(correct, dtype=np.int64)
+    gradable = correct >= 0
+    # Masks of ungradable questions are -1; keep them in range for the bit counts
+    correct = np.where(gradable, correct, 0)
+
+    if rule == "all_or_nothing":
+        scores = (selected == correct).astype(np.float64)
+    else:
+        hits = popcount(selected & correct)
+        misses = popcount(selected & ~correct & options)
+        n_correct = popcount(correct)
+        n_wrong = popcount(options & ~correct)
+        # A question with no correct option is scored like all_or_nothing: 1 only for no ticks
+        share = np.divide(hits, n_correct, out=(misses == 0).astype(np.float64), where=n_correct > 0)
+        if rule == "proportional":
+            scores = np.where(misses == 0, share, 0.0)
+        else:
+            penalty = np.divide(misses, n_wrong, out=np.zeros(len(misses)), where=n_wrong > 0)
+            scores = np.clip(share - penalty, 0.0, 1.0)
+    return np.where(gradable, scores, 0.0)
+
+def apply_late_policy(scores, late_by, policy=DEFAULT_LATE_POLICY):
+    """
+    Scores of a sheet handed in `late_by` seconds after its deadline (0 or less if on time):
+    unchanged within LATE_GRACE, otherwise as `policy` says - all zeros, or None if rejected.
+    """
+    if policy not in LATE_POLICIES:
+        raise ValueError(f"Unknown late policy: {policy!r} (expected one of {', '.join(LATE_POLICIES)})")
+    if late_by <= LATE_GRACE:
+        return scores
+    if policy == "reject":
+        return None
+    return np.zeros_like(scores)
@@ -1,212 +1,711 @@
 import pdfplumber
+import argparse
+import glob
+import hashlib
 import json
+import os
 import re
+import time
+import numpy as np
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pdfminer.pdftypes import PDFObjRef, PDFStream, resolve1
 
-def is_highlight_color(color):
+import fast_backend
+from near_duplicates import collapse_near_duplicates, find_near_duplicates, near_duplicate_report
+from question_bank import write_bank
+from timings import TIMINGS
+
+# Bump when a change alters the lines produced for a page, invalidates the page cache
+EXTRACTOR_VERSION = 1
+
+# Upper bound on pages handed to one worker task
+MAX_PAGES_PER_TASK = 16
+
+# How pages are parsed: "pdfplumber" builds every layout object, "fast" (fast_backend.py)
+# only chars and rects. Both give the same lines, so they share the page cache.
+BACKENDS = ("pdfplumber", "fast")
+
+def _color_components(color):
+    # Colors are usually tuples of floats: (gray,), (r, g, b) or (c, m, y, k).
+    # Anything else (None, plain numbers, pattern names) can't be a green/yellow highlight.
+    if isinstance(color, (list, tuple)) and len(color) in (3, 4):
+        try:
+            return [float(v) for v in color] + [np.nan] * (4 - len(color)), len(color)
+        except (TypeError, ValueError):
+            pass
+    return [np.nan] * 4, 0
+
+def highlight_color_mask(colors):
     """
-    Check if color is green or yellow.
-    Color is usually a tuple of floats (r, g, b).
-    Deepmind logic: Be somewhat flexible.
+    Check a whole sequence of colors at once, True where the color is green or yellow.
+    Be somewhat flexible.
     Green: (0, 1, 0) approx
     Yellow: (1, 1, 0) approx
     """
-    if not color:
-        return False
-    if isinstance(color, (int, float)):
-        return False # Grayscale highlights unlikely to be "green/yellow" unless specific values, but usually colors are tuples.
-        
-    if isinstance(color, (list, tuple)):
-        if len(color) == 3:
-            r, g, b = color
-            # Green-ish: Low R, High G, Low B (or varies)
-            # Yellow-ish: High R, High G, Low B
-            
-            # Pure Green (0, 1, 0)
-            if r < 0.2 and g > 0.8 and b < 0.2:
-                return True
-            # Pure Yellow (1, 1, 0)
-            if r > 0.8 and g > 0.8 and b < 0.2:
-                return True
-            # Light Green / Highlighter colors often used in PDFs
-            # e.g. (0.5, 1, 0.5)
-            if g > 0.8 and r < 0.9 and b < 0.9: # Broad green check
-                 return True
-            if r > 0.8 and g > 0.8 and b < 0.6: # Broad yellow check
-                 return True
-        elif len(color) == 4: # CMYK?
-            # c, m, y, k
-            # Yellow is (0, 0, 1, 0)
-            c, m, y, k = color
-            if y > 0.8 and k < 0.2:
+    # A page uses only a handful of distinct colors, convert each of them once
+    keys = [tuple(color) if isinstance(color, list) else color for color in colors]
+    codes = {}
+    positions = np.array([codes.setdefault(key, len(codes)) for key in keys], dtype=int)
+    components = [_color_components(color) for color in codes]
+    values = np.array([c for c, _ in components], dtype=float).reshape(-1, 4)
+    sizes = np.array([n for _, n in components], dtype=int)
+    r, g, b = values[:, 0], values[:, 1], values[:, 2]
+
+    rgb = (
+        # Pure Green (0, 1, 0)
+        ((r < 0.2) & (g > 0.8) & (b < 0.2))
+        # Pure Yellow (1, 1, 0)
+        | ((r > 0.8) & (g > 0.8) & (b < 0.2))
+        # Light Green / Highlighter colors often used in PDFs, e.g. (0.5, 1, 0.5)
+        | ((g > 0.8) & (r < 0.9) & (b < 0.9))
+        # Broad yellow check
+        | ((r > 0.8) & (g > 0.8) & (b < 0.6))
+    )
+    # CMYK: yellow is (0, 0, 1, 0)
+    cmyk = (values[:, 2] > 0.8) & (values[:, 3] < 0.2)
+
+    return (((sizes == 3) & rgb) | ((sizes == 4) & cmyk))[positions]
+
+def is_highlight_color(color):
+    """Check if a single color is green or yellow."""
+    return bool(highlight_color_mask([color])[0])
+
+class HighlightIndex:
+    """
+    Highlight rects of one page sorted by 'top'.
+    A line only has to look at the rects whose 'top' falls in a window around it,
+    found with bisect, instead of scanning every rect on the page.
+    """
+    def __init__(self, highlights):
+        rects = sorted(
+            ((h['top'], h['bottom'], h['x0'], h['x1']) for h in highlights),
+            key=lambda r: r[0],
+        )
+        self._rects = rects
+        self._tops = [r[0] for r in rects]
+        # A rect that reaches down into a line cannot start further up than the tallest rect
+        self._max_height = max((bottom - top for top, bottom, _, _ in rects), default=0)
+
+    def overlaps(self, bbox):
+        x0, top, x1, bottom = bbox
+        # Small slack so float rounding in the window never drops a candidate,
+        # the exact intersection test below decides.
+        lo = bisect_left(self._tops, top - self._max_height - 1e-6)
+        hi = bisect_left(self._tops, bottom)
+        for h_top, h_bottom, h_x0, h_x1 in self._rects[lo:hi]:
+            # Intersection, same rule as before: any overlap marks the line
+            if min(x1, h_x1) > max(x0, h_x0) and min(bottom, h_bottom) > max(top, h_top):
                 return True
-    return False
-    return False
+        return False
 
-def extract_questions(pdf_path):
-    questions = []
-    
-    current_question = None
-    last_y = 0
-    
+    def overlaps_many(self, boxes):
+        """
+        Vectorized overlaps() for an (n, 4) array of line boxes.
+        Every line's candidate window is found with one searchsorted call and all
+        (line, candidate) pairs are tested at once.
+        """
+        boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+        result = np.zeros(len(boxes), dtype=bool)
+        if not self._rects or not len(boxes):
+            return result
+
+        rects = np.array(self._rects, dtype=float)
+        lo = np.searchsorted(rects[:, 0], boxes[:, 1] - self._max_height - 1e-6, side='left')
+        hi = np.searchsorted(rects[:, 0], boxes[:, 3], side='left')
+        counts = np.maximum(hi - lo, 0)
+        if not counts.sum():
+            return result
+
+        # Flatten the windows into (line, rect) candidate pairs
+        line_of = np.repeat(np.arange(len(boxes)), counts)
+        run_start = np.repeat(np.cumsum(counts) - counts, counts)
+        candidates = np.repeat(lo, counts) + np.arange(len(line_of)) - run_start
+
+        b = boxes[line_of]
+        r = rects[candidates]
+        hit = (
+            (np.minimum(b[:, 2], r[:, 3]) > np.maximum(b[:, 0], r[:, 2]))
+            & (np.minimum(b[:, 3], r[:, 1]) > np.maximum(b[:, 1], r[:, 0]))
+        )
+        result[line_of[hit]] = True
+        return result
+
+class PageModel:
+    """
+    Word coordinates and rect colors of one page held in NumPy arrays,
+    so lines and highlights are computed in vectorized passes.
+    """
+    def __init__(self, words, rects, page_number=None):
+        # Only used to label the stage timings
+        self.page_number = page_number
+        self.texts = [w['text'] for w in words]
+        self.word_boxes = np.array(
+            [(w['x0'], w['top'], w['x1'], w['bottom']) for w in words], dtype=float
+        ).reshape(-1, 4)
+
+        with TIMINGS.stage("rect_filter", page=page_number):
+            # A rect is a highlight if its fill or its stroke color is
+            highlighted = (
+                highlight_color_mask([rect.get("non_stroking_color") for rect in rects])
+                | highlight_color_mask([rect.get("stroking_color") for rect in rects])
+            )
+            self.highlights = [rect for rect, hit in zip(rects, highlighted) if hit]
+
+    @classmethod
+    def from_page(cls, page, backend="pdfplumber"):
+        with TIMINGS.stage("extract_words", page=page.page_number, backend=backend):
+            # 'extract_words' gives coordinates; keep_blank_chars keeps a line's words together
+            if backend == "fast":
+                words, rects = fast_backend.extract_words(page, keep_blank_chars=True)
+            elif backend == "pdfplumber":
+                words, rects = page.extract_words(keep_blank_chars=True), page.rects
+            else:
+                raise ValueError(f"unknown backend {backend!r}, expected one of {BACKENDS}")
+        return cls(words, rects, page.page_number)
+
+    def line_starts(self):
+        """
+        Index of the first word of every line.
+        Words are in reading order; a new line starts where 'top' jumps by 5 or more
+        from the previous word.
+        """
+        tops = self.word_boxes[:, 1]
+        breaks = np.flatnonzero(np.abs(np.diff(tops)) >= 5) + 1
+        return np.concatenate(([0], breaks)) if len(tops) else breaks
+
+    def line_boxes(self, starts):
+        """Bounding box (x0, top, x1, bottom) of every line."""
+        boxes = self.word_boxes
+        return np.column_stack((
+            np.minimum.reduceat(boxes[:, 0], starts),
+            np.minimum.reduceat(boxes[:, 1], starts),
+            np.maximum.reduceat(boxes[:, 2], starts),
+            np.maximum.reduceat(boxes[:, 3], starts),
+        ))
+
+    def lines(self):
+        """List of (line_text, is_highlighted) tuples in reading order."""
+        if not self.texts:
+            return []
+        with TIMINGS.stage("line_clustering", page=self.page_number):
+            starts = self.line_starts()
+            ends = starts[1:].tolist() + [len(self.texts)]
+            boxes = self.line_boxes(starts)
+            texts = [" ".join(self.texts[start:end]).strip() for start, end in zip(starts.tolist(), ends)]
+        with TIMINGS.stage("highlight_matching", page=self.page_number):
+            highlighted = HighlightIndex(self.highlights).overlaps_many(boxes)
+        return list(zip(texts, highlighted.tolist()))
+
+def _page_lines(page, backend="pdfplumber"):
+    """
+    Reconstruct the text lines of a single page.
+    Returns a list of (line_text, is_highlighted) tuples in reading order.
+    """
+    return PageModel.from_page(page, backend).lines()
+
+def _closed_page_lines(pdf, n, backend="pdfplumber"):
+    """
+    Lines of page n, then the page's cached layout objects are dropped: pdfplumber keeps
+    them until the file is closed, a few MB per page, so memory would grow with the PDF.
+    """
+    page = pdf.pages[n]
+    try:
+        return _page_lines(page, backend)
+    finally:
+        page.close()
+
+class PageCache:
+    """
+    On-disk cache of reconstructed page lines.
+    Each page is keyed by a hash of its content streams, of every resource they can draw
+    from (followed recursively) and EXTRACTOR_VERSION, so a re-run only parses the pages
+    whose content changed.
+    The manifest remembers which pages every PDF uses, so entries of deleted PDFs
+    or of older extractor versions can be evicted.
+    """
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.pages_dir = os.path.join(cache_dir, "pages")
+        self.manifest_path = os.path.join(cache_dir, "manifest.json")
+        os.makedirs(self.pages_dir, exist_ok=True)
+        try:
+            with open(self.manifest_path, "r", encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.manifest = {}
+        self.hits = 0
+        self.misses = 0
+        # Digests of the indirect objects of the document being keyed, by object id;
+        # fonts and forms shared by many pages are hashed once
+        self._object_digests = {}
+        self._digest_doc = None
+
+    def page_key(self, page):
+        obj = page.page_obj
+        digest = hashlib.sha256(f"v{EXTRACTOR_VERSION}:{obj.mediabox}:{obj.cropbox}:{obj.rotate}".encode())
+        for stream in obj.contents:
+            digest.update(resolve1(stream).get_data())
+        # Rects drawn inside Form XObjects count as highlights and fonts decide the text,
+        # so a change in any resource must change the key even if the page stream doesn't
+        if self._digest_doc is not page.pdf.doc:
+            self._digest_doc = page.pdf.doc
+            self._object_digests = {}
+        digest.update(self._digest(obj.resources, set()))
+        return digest.hexdigest()
+
+    def _digest(self, value, visiting):
+        """Hash of a PDF object and everything it references, streams included."""
+        if isinstance(value, PDFObjRef):
+            known = self._object_digests.get(value.objid)
+            if known is not None:
+                return known
+            if value.objid in visiting:
+                # Reference cycle (e.g. a form listing itself in its resources)
+                return b"cycle:%d" % value.objid
+            visiting.add(value.objid)
+            known = self._object_digests[value.objid] = self._digest(value.resolve(), visiting)
+            visiting.discard(value.objid)
+            return known
+        h = hashlib.sha256()
+        if isinstance(value, PDFStream):
+            h.update(b"stream")
+            h.update(self._digest(value.attrs, visiting))
+            h.update(value.get_data())
+        elif isinstance(value, dict):
+            h.update(b"dict")
+            for key in sorted(value, key=str):
+                h.update(str(key).encode() + b"=")
+                h.update(self._digest(value[key], visiting))
+        elif isinstance(value, (list, tuple)):
+            h.update(b"list")
+            for item in value:
+                h.update(self._digest(item, visiting))
+        else:
+            h.update(repr(value).encode())
+        return h.digest()
+
+    def _page_path(self, key):
+        return os.path.join(self.pages_dir, key + ".json")
+
+    def has(self, key):
+        return os.path.exists(self._page_path(key))
+
+    def get(self, key):
+        with open(self._page_path(key), "r", encoding='utf-8') as f:
+            return [tuple(line) for line in json.load(f)]
+
+    def put(self, key, lines):
+        path = self._page_path(key)
+        with open(path + ".tmp", "w", encoding='utf-8') as f:
+            json.dump(lines, f, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+
+    def record(self, pdf_path, keys):
+        # Saved to disk by evict(), so batch workers can hand their entries to the parent
+        self.manifest[os.path.abspath(pdf_path)] = {"version": EXTRACTOR_VERSION, "pages": keys}
+
+    def evict(self):
+        """Drop entries of PDFs that no longer exist or of other extractor versions. Returns the number of removed pages."""
+        self.manifest = {
+            path: entry for path, entry in self.manifest.items()
+            if os.path.exists(path) and entry.get("version") == EXTRACTOR_VERSION
+        }
+        self._save_manifest()
+
+        live = {key for entry in self.manifest.values() for key in entry["pages"]}
+        removed = 0
+        for name in os.listdir(self.pages_dir):
+            if name[:-len(".json")] not in live:
+                os.remove(os.path.join(self.pages_dir, name))
+                removed += 1
+        return removed
+
+    def _save_manifest(self):
+        with open(self.manifest_path + ".tmp", "w", encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2, ensure_ascii=False)
+        os.replace(self.manifest_path + ".tmp", self.manifest_path)
+
+def _extract_pages(pdf_path, page_numbers, timed=False, backend="pdfplumber"):
+    """
+    Worker entry point: open the PDF independently and return the lines
+    of the given pages, one list per page, and the stage timings recorded
+    for them (empty unless timed) for the parent to merge.
+    """
+    if timed:
+        TIMINGS.enable()
     with pdfplumber.open(pdf_path) as pdf:
-        for page_num, page in enumerate(pdf.pages):
-            # 1. Get all rects that might be highlights
-            highlights = []
-            for rect in page.rects:
-                # Check fill color
-                if is_highlight_color(rect.get("non_stroking_color")):
-                    highlights.append(rect)
-                elif is_highlight_color(rect.get("stroking_color")):
-                    highlights.append(rect)
-                    
-            # 2. Extract text with layout
-            # We iterate words or lines. 'extract_words' gives coordinates.
-            # But 'extract_text' handles layout better for humans.
-            # Let's try iterating line by line using extract_words and clustering them manually 
-            # OR use extract_text(layout=True) and split lines, but then we lose exact coords for highlight matching.
-            
-            # Better approach: Extract separate text lines with their bounding boxes.
-            # pdfplumber doesn't have a direct "extract_lines" with bboxes exposed easily in all versions, 
-            # but we can look at "chars" and cluster them.
-            # OR simpler: use page.extract_words and reconstruct lines.
-            
-            words = page.extract_words(keep_blank_chars=True)
-            
-            # Simple line reconstruction based on 'top' coordinate
-            lines = []
-            if not words:
-                continue
-                
-            current_line = [words[0]]
-            for word in words[1:]:
-                # If vertical distance is small, same line
-                if abs(word['top'] - current_line[-1]['top']) < 5:
-                    current_line.append(word)
+        pages = [_closed_page_lines(pdf, n, backend) for n in page_numbers]
+    return pages, TIMINGS.drain() if timed else []
+
+def _parse_pages(pdf_path, page_numbers, workers=1, backend="pdfplumber"):
+    """Yield the lines of the given pages in order, parsed in-process or in a pool."""
+    if not page_numbers:
+        return
+    if workers <= 1:
+        with pdfplumber.open(pdf_path) as pdf:
+            for n in page_numbers:
+                yield _closed_page_lines(pdf, n, backend)
+        return
+
+    # Several small ranges per worker keep the pool busy when some pages
+    # are much denser than others, capped so each result stays small.
+    chunk_size = min(MAX_PAGES_PER_TASK, max(1, -(-len(page_numbers) // (workers * 4))))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Only a bounded number of ranges is in flight, so finished pages
+        # never pile up in memory while the consumer is busy writing.
+        pending = deque()
+        for start in range(0, len(page_numbers), chunk_size):
+            chunk = page_numbers[start:start + chunk_size]
+            pending.append(executor.submit(_extract_pages, pdf_path, chunk, TIMINGS.enabled, backend))
+            if len(pending) >= workers * 2:
+                yield from _merge_worker_timings(pending.popleft().result())
+        while pending:
+            yield from _merge_worker_timings(pending.popleft().result())
+
+def _merge_worker_timings(result):
+    pages, records = result
+    TIMINGS.extend(records)
+    return pages
+
+def _iter_page_lines(pdf_path, workers=1, cache=None, backend="pdfplumber"):
+    with pdfplumber.open(pdf_path) as pdf:
+        page_count = len(pdf.pages)
+        keys = [cache.page_key(page) for page in pdf.pages] if cache else None
+
+    if cache:
+        missing = [n for n, key in enumerate(keys) if not cache.has(key)]
+    else:
+        missing = list(range(page_count))
+    parsed = _parse_pages(pdf_path, missing, workers, backend)
+    missing = set(missing)
+
+    for n in range(page_count):
+        if n in missing:
+            lines = next(parsed)
+            if cache:
+                cache.put(keys[n], lines)
+                cache.misses += 1
+        else:
+            lines = cache.get(keys[n])
+            cache.hits += 1
+        yield lines
+
+    if cache:
+        cache.record(pdf_path, keys)
+
+def _assemble_questions(pages):
+    """Yield (page_number, question) pairs, page_number being the 1-based page of the question header."""
+    current_question = None
+    current_page = None
+
+    for page_num, page_lines in enumerate(pages, start=1):
+        # Only the per-line matching is timed and summed into one record per page, so the
+        # consumer's time between two questions stays out of regex_matching
+        timed = TIMINGS.enabled
+        matching = 0.0
+        for line_text, is_highlighted in page_lines:
+            if timed:
+                line_start = time.perf_counter()
+            finished = None
+            # 3. Check regex
+            # Question: "1. Tresc..."
+            q_match = re.match(r'^(\d+)\.\s*(.*)', line_text)
+            opt_match = re.match(r'^([a-z])\)\s*(.*)', line_text)
+
+            if q_match:
+                # Previous question is finished
+                if current_question:
+                    finished = (current_page, current_question)
+
+                q_id = int(q_match.group(1))
+                q_text = q_match.group(2).strip()
+
+                current_question = {
+                    "id": q_id,
+                    "text": q_text, # Will append subsequent lines if they are not options
+                    "options": {},
+                    "correct_answers": []
+                }
+                current_page = page_num
+
+            elif opt_match and current_question:
+                opt_char = opt_match.group(1)
+                opt_text = opt_match.group(2).strip()
+
+                current_question["options"][opt_char] = opt_text
+
+                # The line bbox overlaps a highlight rect
+                if is_highlighted:
+                    current_question["correct_answers"].append(opt_char)
+
+            elif current_question:
+                # Continuation lines
+                # If we have options, and this line doesn't start with option, maybe it's continuation of last option
+                # Or continuation of question text if no options yet
+                # Pages are processed in order, so this also joins lines that continue on the next page.
+                if not current_question["options"]:
+                    # Append to question text
+                    current_question["text"] += " " + line_text
                 else:
-                    lines.append(current_line)
-                    current_line = [word]
-            lines.append(current_line)
-            
-            # Process lines
-            for line_limit in lines:
-                # Reconstruct text string
-                line_text = " ".join([w['text'] for w in line_limit]).strip()
-                
-                # Bounding box of the line
-                x0 = min([w['x0'] for w in line_limit])
-                top = min([w['top'] for w in line_limit])
-                x1 = max([w['x1'] for w in line_limit])
-                bottom = max([w['bottom'] for w in line_limit])
-                
-                # 3. Check regex
-                # Question: "1. Tresc..."
-                q_match = re.match(r'^(\d+)\.\s*(.*)', line_text)
-                opt_match = re.match(r'^([a-z])\)\s*(.*)', line_text)
-                
-                if q_match:
-                    # Save previous question
-                    if current_question:
-                        questions.append(current_question)
-                    
-                    q_id = int(q_match.group(1))
-                    q_text = q_match.group(2).strip()
-                    
-                    current_question = {
-                        "id": q_id,
-                        "text": q_text, # Will append subsequent lines if they are not options
-                        "options": {},
-                        "correct_answers": []
-                    }
-                    
-                    # Sometimes question text is multiline. 
-                    # We might need a state "IN_QUESTION" vs "IN_OPTION"
-                    
-                elif opt_match and current_question:
-                    opt_char = opt_match.group(1)
-                    opt_text = opt_match.group(2).strip()
-                    
-                    current_question["options"][opt_char] = opt_text
-                    
-                    # Check for highlight overlap
-                    # We check if the line bbox overlaps significantly with any highlight rect
-                    is_correct = False
-                    line_area = (x1 - x0) * (bottom - top)
-                    
-                    for h_rect in highlights:
-                        # Intersection
-                        h_x0, h_top, h_x1, h_bottom = h_rect['x0'], h_rect['top'], h_rect['x1'], h_rect['bottom'] # pdfplumber rects are dicts usually?
-                        # Actually rects in pdfplumber pages are dicts.
-                        
-                        # Rect dict keys: x0, y0, x1, y1 (bottom-up?) NO, pdfplumber normalizes to top-down usually in words, BUT
-                        # Raw pdfminer rects might be varying. pdfplumber 'rects' property returns dictionaries with 'top', 'bottom', 'x0', 'x1'.
-                        
-                        # Check intersection
-                        i_x0 = max(x0, h_rect['x0'])
-                        i_top = max(top, h_rect['top'])
-                        i_x1 = min(x1, h_rect['x1'])
-                        i_bottom = min(bottom, h_rect['bottom'])
-                        
-                        if i_x1 > i_x0 and i_bottom > i_top:
-                            # Intersection exists
-                            # Check if the highlight covers the option letter or text significantly
-                            # Highlights often cover the whole line or just the letter
-                            is_correct = True # Assume any intersection marks it
-                            break
-                    
-                    if is_correct:
-                        current_question["correct_answers"].append(opt_char)
-                        
-                elif current_question:
-                    # Continuation lines
-                    # If we have options, and this line doesn't start with option, maybe it's continuation of last option
-                    # Or continuation of question text if no options yet
-                    
-                    # Logic:
-                    if not current_question["options"]:
-                        # Append to question text
-                        current_question["text"] += " " + line_text
-                    else:
-                        # Append to last option
-                        # Find last added key
-                        keys = list(current_question["options"].keys())
-                        if keys:
-                            last_key = keys[-1]
-                            current_question["options"][last_key] += " " + line_text
-                            
-                            # Check highlight again for continuation line (in case highlight is only on second line?)
-                            # Usually highlight is on the letter or first line.
-                            if last_key not in current_question["correct_answers"]:
-                                for h_rect in highlights:
-                                    i_x0 = max(x0, h_rect['x0'])
-                                    i_top = max(top, h_rect['top'])
-                                    i_x1 = min(x1, h_rect['x1'])
-                                    i_bottom = min(bottom, h_rect['bottom'])
-                                    if i_x1 > i_x0 and i_bottom > i_top:
-                                        current_question["correct_answers"].append(last_key)
-                                        break
-    
+                    # Append to last option
+                    last_key = list(current_question["options"].keys())[-1]
+                    current_question["options"][last_key] += " " + line_text
+
+                    # Check highlight again for continuation line (in case highlight is only on second line?)
+                    # Usually highlight is on the letter or first line.
+                    if is_highlighted and last_key not in current_question["correct_answers"]:
+                        current_question["correct_answers"].append(last_key)
+
+            if timed:
+                matching += time.perf_counter() - line_start
+            # Handed out as soon as the next header is seen, outside the timed part
+            if finished:
+                yield finished
+        if timed:
+            TIMINGS.record("regex_matching", matching, {"page": page_num})
+
     if current_question:
-        questions.append(current_question)
+        yield current_page, current_question
+
+def iter_questions(pdf_path, workers=1, cache=None, backend="pdfplumber"):
+    """
+    Yield questions one by one, each as soon as the next question header is seen.
+    With workers > 1 pages are parsed in a process pool and stitched back together in page order.
+    With a PageCache only pages whose content changed since the last run are parsed.
+    backend="fast" parses pages with fast_backend.py instead of full pdfplumber objects.
+    """
+    return (q for _, q in _assemble_questions(_iter_page_lines(pdf_path, workers, cache, backend)))
 
-    return questions
+def extract_questions(pdf_path, workers=1, cache=None, backend="pdfplumber"):
+    return list(iter_questions(pdf_path, workers, cache, backend))
 
-if __name__ == "__main__":
-    file_path = "prawo-pracy-poprawione-v2.pdf"
-    output_path = "baza_pytan.json"
-    
-    data = extract_questions(file_path)
-    
-    # Clean up and validate
-    final_questions = []
-    for q in data:
-        # Sort answers
-        q["correct_answers"] = sorted(list(set(q["correct_answers"])))
-        
-        # Remove empty questions or malformed ones
+def clean_questions(questions):
+    """Sort and deduplicate answers, drop empty or malformed questions."""
+    for q in questions:
+        q["correct_answers"] = sorted(set(q["correct_answers"]))
         if q["text"] and q["options"]:
-            final_questions.append(q)
-            
-    print(f"Extracted {len(final_questions)} questions.")
-    
-    with open(output_path, "w", encoding='utf-8') as f:
-        json.dump(final_questions, f, indent=2, ensure_ascii=False)
+            yield q
+
+def write_ndjson(questions, ndjson_path):
+    """
+    Write questions as NDJSON, one record per line, flushed as they arrive
+    so everything extracted so far survives a crash. Returns the record count.
+    """
+    count = 0
+    with open(ndjson_path, "w", encoding='utf-8') as f:
+        for q in questions:
+            f.write(json.dumps(q, ensure_ascii=False) + "\n")
+            f.flush()
+            count += 1
+    return count
+
+def read_ndjson(ndjson_path):
+    with open(ndjson_path, "r", encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def ndjson_to_json(ndjson_path, output_path):
+    """
+    Turn the NDJSON file into the JSON array used by the app, one record at a time.
+    The output is the same as json.dump(..., indent=2) and replaces output_path atomically.
+    """
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "w", encoding='utf-8') as dst:
+        dst.write("[")
+        first = True
+        for q in read_ndjson(ndjson_path):
+            record = json.dumps(q, indent=2, ensure_ascii=False)
+            dst.write("\n  " if first else ",\n  ")
+            dst.write(record.replace("\n", "\n  "))
+            first = False
+        dst.write("]" if first else "\n]")
+    os.replace(tmp_path, output_path)
+
+def _normalize_text(text):
+    return " ".join(text.split()).casefold()
+
+def question_uid(q):
+    """
+    Stable id of a question, the same for identical questions in any file or year.
+    Only the text and the options count, not the answer: fixing a highlight keeps the id,
+    and with it the users' progress, schedule and statistics kept under it.
+    """
+    content = json.dumps(
+        [_normalize_text(q["text"]), {label: _normalize_text(text) for label, text in q["options"].items()}],
+        ensure_ascii=False, sort_keys=True,
+    )
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()[:16]
+
+def _extract_file(pdf_path, cache_dir=None, timed=False, backend="pdfplumber"):
+    """
+    Worker entry point of the batch mode: cleaned questions of one PDF with their pages.
+    Also returns the file's page cache manifest entry, hit/miss counts and stage timings
+    for the parent to merge.
+    """
+    if timed:
+        TIMINGS.enable()
+    cache = PageCache(cache_dir) if cache_dir else None
+    located = []
+    for page_num, q in _assemble_questions(_iter_page_lines(pdf_path, cache=cache, backend=backend)):
+        for q in clean_questions([q]):
+            located.append((page_num, q))
+    records = [(ts, name, seconds, {"file": pdf_path, **labels})
+               for ts, name, seconds, labels in TIMINGS.drain()] if timed else []
+    if not cache:
+        return located, None, 0, 0, records
+    return located, cache.manifest.get(os.path.abspath(pdf_path)), cache.hits, cache.misses, records
+
+def build_bank(pdf_paths, workers=None, cache=None, backend="pdfplumber"):
+    """
+    Extract several PDFs concurrently, one file per worker process, and merge them into one bank.
+    Every question gets a stable, globally unique id; duplicates across files are merged
+    and keep the list of files and pages they appear on.
+
+    Copies whose highlights disagree are merged too: the answer most files mark wins (the
+    first one seen on a tie), the entry gets "answer_conflict": true and each of its sources
+    records the answer its file marks, so the conflict can be checked in the PDFs.
+    """
+    bank = {}
+    # uid -> answers of the entry's sources, in the order of its 'sources'
+    source_answers = {}
+    cache_dir = cache.cache_dir if cache else None
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # map() keeps the input order, so the bank order doesn't depend on which file finishes first
+        results = executor.map(_extract_file, pdf_paths, [cache_dir] * len(pdf_paths),
+                               [TIMINGS.enabled] * len(pdf_paths), [backend] * len(pdf_paths))
+        for pdf_path, (located, cache_entry, hits, misses, records) in zip(pdf_paths, results):
+            TIMINGS.extend(records)
+            if cache:
+                cache.manifest[os.path.abspath(pdf_path)] = cache_entry
+                cache.hits += hits
+                cache.misses += misses
+            for page_num, q in located:
+                source = {"file": pdf_path, "page": page_num, "number": q["id"]}
+                uid = question_uid(q)
+                if uid in bank:
+                    bank[uid]["sources"].append(source)
+                    source_answers[uid].append(q["correct_answers"])
+                    continue
+                bank[uid] = {
+                    "id": uid,
+                    "text": q["text"],
+                    "options": q["options"],
+                    "correct_answers": q["correct_answers"],
+                    "sources": [source],
+                }
+                source_answers[uid] = [q["correct_answers"]]
+
+    for uid, answers in source_answers.items():
+        distinct = []
+        for answer in answers:
+            if answer not in distinct:
+                distinct.append(answer)
+        if len(distinct) < 2:
+            continue
+        entry = bank[uid]
+        # max() keeps the first of equally common answers, i.e. the first one seen
+        entry["correct_answers"] = max(distinct, key=answers.count)
+        entry["answer_conflict"] = True
+        for source, answer in zip(entry["sources"], answers):
+            source["correct_answers"] = answer
+    return list(bank.values())
+
+def _expand_inputs(patterns):
+    # Globs are expanded here so they also work where the shell doesn't do it
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) or [pattern]
+        for path in matches:
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+def _near_duplicate_pass(questions, report_path=None, collapse=False):
+    """Report and optionally collapse near-duplicates (see near_duplicates.py). Needs the whole bank in memory."""
+    questions = list(questions)
+    clusters = find_near_duplicates(questions)
+    report = near_duplicate_report(questions, clusters)
+    if report_path:
+        with open(report_path, "w", encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Near-duplicates: {report['clusters']} clusters, {report['conflicts']} with conflicting answers.")
+    return collapse_near_duplicates(questions, clusters) if collapse else questions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract quiz questions from highlighted PDFs.")
+    parser.add_argument("inputs", nargs="*", default=["prawo-pracy-poprawione-v2.pdf"],
+                        help="PDF files or glob patterns; several files are merged into one bank")
+    parser.add_argument("-o", "--output", dest="output_path", default="baza_pytan.json")
+    parser.add_argument("-j", "--workers", type=int,
+                        help="number of worker processes: pages of a single file (default: 1) "
+                             "or whole files in batch mode (default: all cores)")
+    parser.add_argument("--merge", action="store_true",
+                        help="write a merged bank with global ids and sources even for a single file")
+    parser.add_argument("--ndjson", dest="ndjson_path",
+                        help="intermediate NDJSON file, kept if the run fails (default: <output>.ndjson)")
+    parser.add_argument("--binary", dest="binary_path",
+                        help="also write the bank in the indexed binary format read by the app (e.g. baza_pytan.qbank)")
+    parser.add_argument("--cache-dir", default=".extract_cache",
+                        help="directory of the per-page extraction cache (default: .extract_cache)")
+    parser.add_argument("--no-cache", action="store_true", help="parse every page, ignoring the cache")
+    parser.add_argument("--backend", choices=BACKENDS, default="pdfplumber",
+                        help="page parser: full pdfplumber objects or the lean chars-and-rects parser (same output)")
+    parser.add_argument("--near-duplicates", dest="near_duplicates_path",
+                        help="write a report of near-duplicate questions and conflicting answers to this file")
+    parser.add_argument("--collapse-near-duplicates", action="store_true",
+                        help="keep one question per near-duplicate cluster whose answers agree")
+    parser.add_argument("--timings", dest="timings_path",
+                        help="record per-page stage timings, write them as JSON lines to this file "
+                             "and print a summary (also enabled by QUIZ_TIMINGS=1)")
+    args = parser.parse_args()
+    if args.timings_path:
+        TIMINGS.enable()
+
+    cache = None if args.no_cache else PageCache(args.cache_dir)
+    pdf_paths = _expand_inputs(args.inputs)
+    near_duplicates = args.near_duplicates_path or args.collapse_near_duplicates
+
+    if len(pdf_paths) > 1 or args.merge:
+        bank = build_bank(pdf_paths, workers=args.workers, cache=cache, backend=args.backend)
+        if near_duplicates:
+            bank = _near_duplicate_pass(bank, args.near_duplicates_path, args.collapse_near_duplicates)
+        with open(args.output_path, "w", encoding='utf-8') as f:
+            json.dump(bank, f, indent=2, ensure_ascii=False)
+        if args.binary_path:
+            write_bank(bank, args.binary_path)
+        duplicates = sum(len(q["sources"]) - 1 for q in bank)
+        conflicts = sum(q.get("answer_conflict", False) for q in bank)
+        print(f"Extracted {len(bank)} questions from {len(pdf_paths)} files ({duplicates} duplicates merged, "
+              f"{conflicts} with answers that differ between files).")
+    else:
+        ndjson_path = args.ndjson_path or os.path.splitext(args.output_path)[0] + ".ndjson"
+
+        questions = clean_questions(iter_questions(pdf_paths[0], workers=args.workers or 1, cache=cache,
+                                                   backend=args.backend))
+        count = write_ndjson(questions, ndjson_path)
+        if near_duplicates:
+            # The extraction is on disk by now; only this optional pass holds the whole bank
+            bank = _near_duplicate_pass(read_ndjson(ndjson_path), args.near_duplicates_path,
+                                        args.collapse_near_duplicates)
+            if args.collapse_near_duplicates:
+                # Swapped in whole, a crash while writing leaves the full extraction in place
+                count = write_ndjson(bank, ndjson_path + ".tmp")
+                os.replace(ndjson_path + ".tmp", ndjson_path)
+            del bank
+        ndjson_to_json(ndjson_path, args.output_path)
+        if args.binary_path:
+            write_bank(read_ndjson(ndjson_path), args.binary_path)
+        os.remove(ndjson_path)
+
+        print(f"Extracted {count} questions.")
+    if cache:
+        evicted = cache.evict()
+        print(f"Page cache: {cache.hits} hits, {cache.misses} misses, {evicted} stale entries evicted.")
+    if TIMINGS.enabled:
+        if args.timings_path:
+            TIMINGS.write_jsonl(args.timings_path)
+        print(TIMINGS.format_summary())
@@ -0,0 +1,113 @@
+"""
+Lean page parser for extract_questions.py: runs pdfminer's content-stream interpreter with a
+device that keeps only what the extractor reads - char text and boxes, and rectangles with
+their colors - instead of letting pdfplumber build every layout object and convert each one
+to a dict with all of its attributes.
+
+Chars and rects come out as the same dicts (for the keys used) as page.chars and page.rects,
+and words are grouped by pdfplumber's own WordExtractor, so lines and questions are the same
+as with the pdfplumber backend.
+"""
+from pdfminer.converter import PDFLayoutAnalyzer
+from pdfminer.layout import LTRect
+from pdfminer.pdffont import PDFUnicodeNotDefined
+from pdfminer.pdfinterp import PDFPageInterpreter
+from pdfminer.utils import apply_matrix_rect
+from pdfplumber.utils.pdfinternals import resolve_all
+from pdfplumber.utils.text import WordExtractor
+
+class _RectCollector:
+    # Stands in for the LTPage pdfminer adds painted paths to; keeps the rectangles only
+    def __init__(self):
+        self.rects = []
+
+    def add(self, item):
+        if isinstance(item, LTRect):
+            self.rects.append(item)
+
+class _PageDevice(PDFLayoutAnalyzer):
+    def __init__(self, rsrcmgr):
+        PDFLayoutAnalyzer.__init__(self, rsrcmgr)
+        # (text, x0, y0, x1, y1, upright) in pdfminer's page space
+        self.chars = []
+        self.cur_item = _RectCollector()
+
+    def begin_page(self, page, ctm):
+        pass
+
+    def end_page(self, page):
+        pass
+
+    # Form XObjects: the interpreter already passes page-space matrices, no container needed
+    def begin_figure(self, name, bbox, matrix):
+        pass
+
+    def end_figure(self, name):
+        pass
+
+    def render_image(self, name, stream):
+        pass
+
+    def render_char(self, matrix, font, fontsize, scaling, rise, cid, ncs, graphicstate):
+        # Same text and bounding box as pdfminer's LTChar, without building one
+        try:
+            text = font.to_unichr(cid)
+        except PDFUnicodeNotDefined:
+            text = self.handle_undefined_char(font, cid)
+        adv = font.char_width(cid) * fontsize * scaling
+        if font.is_vertical():
+            vx, vy = font.char_disp(cid)
+            vx = fontsize * 0.5 if vx is None else vx * fontsize * 0.001
+            vy = (1000 - vy) * fontsize * 0.001
+            bbox = (-vx, vy + rise + adv, -vx + fontsize, vy + rise)
+        else:
+            descent = font.get_descent() * fontsize
+            bbox = (0, descent + rise, adv, descent + rise + fontsize)
+        a, b, c, d, _, _ = matrix
+        x0, y0, x1, y1 = apply_matrix_rect(matrix, bbox)
+        if x1 < x0:
+            x0, x1 = x1, x0
+        if y1 < y0:
+            y0, y1 = y1, y0
+        self.chars.append((text, x0, y0, x1, y1, a * d * scaling > 0 and b * c <= 0))
+        return adv
+
+def page_objects(page):
+    """
+    (chars, rects) of a pdfplumber page as dicts with the keys extract_words() and the
+    highlight detection use, coordinates converted the way pdfplumber converts them.
+    """
+    device = _PageDevice(page.pdf.rsrcmgr)
+    PDFPageInterpreter(page.pdf.rsrcmgr, device).process_page(page.page_obj)
+
+    height = page.height
+    mb_x0, mb_top = page.mediabox[:2]
+    doctop = page.initial_doctop
+    chars = []
+    for text, x0, y0, x1, y1, upright in device.chars:
+        top = (height - y1) + mb_top
+        chars.append({
+            "text": text,
+            "x0": x0 + mb_x0 if mb_x0 != 0 else x0,
+            "x1": x1 + mb_x0 if mb_x0 != 0 else x1,
+            "top": top,
+            "bottom": (height - y0) + mb_top,
+            "doctop": doctop + top,
+            "upright": upright,
+        })
+    rects = []
+    for rect in device.cur_item.rects:
+        rects.append({
+            "x0": rect.x0 + mb_x0 if mb_x0 != 0 else rect.x0,
+            "x1": rect.x1 + mb_x0 if mb_x0 != 0 else rect.x1,
+            "top": (height - rect.y1) + mb_top,
+            "bottom": (height - rect.y0) + mb_top,
+            "stroking_color": resolve_all(rect.stroking_color),
+            "non_stroking_color": resolve_all(rect.non_stroking_color),
+        })
+    return chars, rects
+
+def extract_words(page, **kwargs):
+    """page.extract_words(**kwargs) and page.rects from one lean pass over the page."""
+    chars, rects = page_objects(page)
+    return WordExtractor(**kwargs).extract_words(chars), rects
@@ -0,0 +1,215 @@
+"""
+Near-duplicate questions in an extracted bank, found with MinHash and LSH.
+
+Each question becomes a set of shingles: word 3-grams of its text and of every option,
+the options taken as a set, so punctuation, case, diacritics and option order don't matter.
+MinHash signatures estimate the Jaccard similarity of two sets; the signatures are cut into
+bands and questions sharing a band land in the same bucket. Only bucket members are
+compared, each with the bucket's first member, so the pass grows close to linearly with
+the bank instead of comparing all pairs.
+
+Clusters whose members mark different options as correct are flagged as conflicts:
+probably a highlight missing or misplaced in one of the PDFs.
+
+    python near_duplicates.py baza_pytan.json --report duplikaty.json
+    python near_duplicates.py baza_pytan.json --collapse -o baza_pytan.json
+"""
+import argparse
+import json
+import zlib
+
+import numpy as np
+
+from search_index import normalize
+
+SHINGLE_SIZE = 3
+NUM_PERM = 120
+BANDS, ROWS = 20, 6
+DEFAULT_THRESHOLD = 0.7
+
+# Hashes are taken modulo a Mersenne prime below 2**32, so a * x + b never overflows uint64
+_PRIME = (1 << 31) - 1
+# Shingles hashed to the same value per question in chunks of this many, bounding memory
+_CHUNK = 1 << 16
+
+def _word_shingles(prefix, text):
+    words = normalize(text)
+    if len(words) <= SHINGLE_SIZE:
+        return {prefix + " ".join(words)}
+    return {prefix + " ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+def shingles(q):
+    """Hashed shingles of the question text and of its option set (labels ignored)."""
+    result = _word_shingles("q:", q["text"])
+    for text in q["options"].values():
+        result |= _word_shingles("o:", text)
+    return {zlib.crc32(s.encode('utf-8')) for s in result}
+
+def minhash_signatures(questions, num_perm=NUM_PERM, seed=1):
+    """(len(questions), num_perm) array of MinHash signatures, computed in vectorized chunks."""
+    rnd = np.random.default_rng(seed)
+    a = rnd.integers(1, _PRIME, size=num_perm, dtype=np.uint64)[:, None]
+    b = rnd.integers(0, _PRIME, size=num_perm, dtype=np.uint64)[:, None]
+
+    hashes, counts = [], []
+    for q in questions:
+        hashed = shingles(q)
+        hashes.extend(hashed)
+        counts.append(len(hashed))
+    hashes = np.array(hashes, dtype=np.uint64)
+    # Every question has at least one shingle, so every reduceat segment is non-empty
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64)
+
+    signatures = np.empty((len(counts), num_perm), dtype=np.uint32)
+    q_lo = 0
+    while q_lo < len(counts):
+        # Whole questions per chunk, at least one
+        q_hi = max(q_lo + 1, int(np.searchsorted(starts, starts[q_lo] + _CHUNK, side='right')))
+        s_lo = starts[q_lo]
+        s_hi = starts[q_hi] if q_hi < len(counts) else len(hashes)
+        permuted = (a * hashes[s_lo:s_hi] + b) % _PRIME
+        signatures[q_lo:q_hi] = np.minimum.reduceat(permuted, starts[q_lo:q_hi] - s_lo, axis=1).T
+        q_lo = q_hi
+    return signatures
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+def find_near_duplicates(questions, threshold=DEFAULT_THRESHOLD, bands=BANDS, rows=ROWS):
+    """
+    Clusters of near-duplicate questions as sorted lists of positions, only clusters of two
+    or more, in order of their first member. Two questions are linked when their estimated
+    Jaccard similarity is at least `threshold`.
+    """
+    if len(questions) < 2:
+        return []
+    signatures = minhash_signatures(questions, num_perm=bands * rows)
+    parent = list(range(len(questions)))
+    multipliers = np.random.default_rng(0).integers(1, 1 << 62, size=rows, dtype=np.uint64)
+
+    for band in range(bands):
+        # One uint64 key per question and band; wrap-around is fine for bucketing
+        keys = signatures[:, band * rows:(band + 1) * rows].astype(np.uint64) @ multipliers
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        bucket_start = np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1]))
+        # Every member of a bucket is compared with the bucket's first member
+        anchors = order[np.maximum.accumulate(np.where(bucket_start, np.arange(len(order)), 0))]
+        members = ~bucket_start
+        left, right = anchors[members], order[members]
+        if not len(left):
+            continue
+        similarity = (signatures[left] == signatures[right]).mean(axis=1)
+        for i, j in zip(left[similarity >= threshold].tolist(), right[similarity >= threshold].tolist()):
+            root_i, root_j = _find(parent, i), _find(parent, j)
+            if root_i != root_j:
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    clusters = {}
+    for i in range(len(questions)):
+        clusters.setdefault(_find(parent, i), []).append(i)
+    return [members for members in clusters.values() if len(members) > 1]
+
+def _word_set(text):
+    return set(normalize(text))
+
+def _aligned_answers(reference, q):
+    """
+    Correct answers of q as labels of the reference question: each option of q is matched
+    to the reference option with the most words in common, so reordered or slightly
+    reworded options still compare equal.
+    """
+    ref_words = {label: _word_set(text) for label, text in reference["options"].items()}
+    aligned = set()
+    for label in q["correct_answers"]:
+        if label not in q["options"] or not ref_words:
+            aligned.add(None)
+            continue
+        words = _word_set(q["options"][label])
+        aligned.add(max(
+            ref_words,
+            key=lambda ref: len(words & ref_words[ref]) / (len(words | ref_words[ref]) or 1),
+        ))
+    return aligned
+
+def has_conflict(questions, cluster):
+    reference = questions[cluster[0]]
+    expected = _aligned_answers(reference, reference)
+    return any(_aligned_answers(reference, questions[n]) != expected for n in cluster[1:])
+
+def near_duplicate_report(questions, clusters):
+    entries = []
+    for cluster in clusters:
+        entries.append({
+            "conflict": has_conflict(questions, cluster),
+            "questions": [
+                {
+                    "id": questions[n]["id"],
+                    "text": questions[n]["text"],
+                    "correct_answers": [
+                        f"{label}) {questions[n]['options'].get(label, '')}" for label in questions[n]["correct_answers"]
+                    ],
+                    **({"sources": questions[n]["sources"]} if "sources" in questions[n] else {}),
+                }
+                for n in cluster
+            ],
+        })
+    # Conflicts first, they need a human
+    entries.sort(key=lambda entry: not entry["conflict"])
+    return {
+        "questions": len(questions),
+        "clusters": len(clusters),
+        "duplicates": sum(len(cluster) - 1 for cluster in clusters),
+        "conflicts": sum(entry["conflict"] for entry in entries),
+        "entries": entries,
+    }
+
+def collapse_near_duplicates(questions, clusters):
+    """
+    Keep the first question of every cluster whose members agree on the answer; the others
+    are dropped and their 'sources' (if any) move to the kept one. Conflicting clusters stay
+    whole, so no answer is chosen silently.
+    """
+    dropped = set()
+    collapsed = list(questions)
+    for cluster in clusters:
+        if has_conflict(questions, cluster):
+            continue
+        keep = cluster[0]
+        if "sources" in questions[keep]:
+            collapsed[keep] = {
+                **questions[keep],
+                "sources": [source for n in cluster for source in questions[n].get("sources", [])],
+            }
+        dropped.update(cluster[1:])
+    return [q for n, q in enumerate(collapsed) if n not in dropped]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find near-duplicate questions in a question bank.")
+    parser.add_argument("bank", help="JSON bank written by extract_questions.py")
+    parser.add_argument("--report", dest="report_path", help="write the clusters and conflicts as JSON")
+    parser.add_argument("--collapse", action="store_true",
+                        help="keep one question per cluster whose members agree on the answer")
+    parser.add_argument("-o", "--output", dest="output_path", help="collapsed bank (default: overwrite the input)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"minimum estimated Jaccard similarity (default: {DEFAULT_THRESHOLD})")
+    args = parser.parse_args()
+
+    with open(args.bank, "r", encoding='utf-8') as f:
+        questions = json.load(f)
+    clusters = find_near_duplicates(questions, threshold=args.threshold)
+    report = near_duplicate_report(questions, clusters)
+    print(f"{report['clusters']} clusters of near-duplicates ({report['duplicates']} redundant questions), "
+          f"{report['conflicts']} with conflicting answers.")
+
+    if args.report_path:
+        with open(args.report_path, "w", encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    if args.collapse:
+        collapsed = collapse_near_duplicates(questions, clusters)
+        with open(args.output_path or args.bank, "w", encoding='utf-8') as f:
+            json.dump(collapsed, f, indent=2, ensure_ascii=False)
+        print(f"Kept {len(collapsed)} of {len(questions)} questions.")
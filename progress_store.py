@@ -0,0 +1,333 @@
+"""
+Per-user quiz progress in a local SQLite database.
+
+One connection is shared by all sessions of the server process. Answers are buffered
+and written in batches, one transaction per batch, by a background flusher (woken early
+when a batch fills up) or by a read that needs them on disk. Two locks keep sessions off
+the disk: the buffers' lock is only held to append or swap a list, the connection's lock
+is held for the SQLite work, so a student's answer never waits on another one's write.
+Question ids are stored as JSON text, which keeps integer and string ids apart.
+Every answer also moves the question between Leitner boxes (see scheduler.py).
+
+The answers table is an append-only log of every graded answer, selected options included.
+Per-question statistics (attempts, errors, wrong options picked) are folded in from the
+log incrementally, only the answers logged since the previous compaction, by the background
+flusher every `stats_interval` seconds. Reading the hardest questions is an index range scan
+of the statistics and never touches the log.
+"""
+import atexit
+import json
+import sqlite3
+import threading
+import time
+
+from scheduler import next_review
+
+SCHEMA = """
+-- Append-only, rows are never updated or deleted, so rowid order is logging order
+CREATE TABLE IF NOT EXISTS answers (
+    user_id     TEXT NOT NULL,
+    question_id TEXT NOT NULL,
+    correct     INTEGER NOT NULL,
+    answered_at REAL NOT NULL,
+    selected    TEXT NOT NULL DEFAULT '[]',
+    -- 1 for answers of an exam sheet handed in after its deadline
+    late        INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS answers_user_question ON answers (user_id, question_id);
+
+CREATE TABLE IF NOT EXISTS incorrect (
+    user_id     TEXT NOT NULL,
+    question_id TEXT NOT NULL,
+    PRIMARY KEY (user_id, question_id)
+) WITHOUT ROWID;
+
+-- Leitner box and next review of every question a user has answered;
+-- the (user_id, due_at) index covers the due query, box included
+CREATE TABLE IF NOT EXISTS schedule (
+    user_id     TEXT NOT NULL,
+    question_id TEXT NOT NULL,
+    box         INTEGER NOT NULL,
+    due_at      REAL NOT NULL,
+    PRIMARY KEY (user_id, question_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS schedule_user_due ON schedule (user_id, due_at, box);
+
+-- Aggregates of the answers up to stats_state.last_rowid; wrong_picks is a JSON object
+-- counting how often each option was ticked in a wrong answer. difficulty is the error rate
+-- smoothed towards 1/2, so a question answered wrong once doesn't top the list
+CREATE TABLE IF NOT EXISTS question_stats (
+    question_id TEXT PRIMARY KEY,
+    attempts    INTEGER NOT NULL,
+    errors      INTEGER NOT NULL,
+    difficulty  REAL NOT NULL,
+    wrong_picks TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS question_stats_difficulty ON question_stats (difficulty);
+
+-- One row: how far the log has been compacted, with running totals for the overview
+CREATE TABLE IF NOT EXISTS stats_state (
+    id           INTEGER PRIMARY KEY CHECK (id = 0),
+    last_rowid   INTEGER NOT NULL,
+    answers      INTEGER NOT NULL,
+    questions    INTEGER NOT NULL,
+    compacted_at REAL
+);
+INSERT OR IGNORE INTO stats_state (id, last_rowid, answers, questions) VALUES (0, 0, 0, 0);
+
+CREATE TABLE IF NOT EXISTS quiz_state (
+    user_id    TEXT PRIMARY KEY,
+    state      TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+# Most answers folded into the statistics per transaction. A backlog (first run after an
+# upgrade, a restart after downtime) is worked off in many short holds of the connection
+# lock, so flushes and reads slip in between batches instead of waiting for all of it
+COMPACT_BATCH = 1000
+
+class ProgressStore:
+    def __init__(self, path, batch_size=100, flush_interval=2.0, stats_interval=60.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stats_interval = stats_interval
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL: a commit doesn't wait for fsync, the database stays consistent after a crash
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        # Databases from before the log kept selected options (and late flags) get the columns,
+        # older answers stay '[]' (and on time)
+        if self._conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'answers'").fetchone():
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(answers)")}
+            if "selected" not in columns:
+                self._conn.execute("ALTER TABLE answers ADD COLUMN selected TEXT NOT NULL DEFAULT '[]'")
+            if "late" not in columns:
+                self._conn.execute("ALTER TABLE answers ADD COLUMN late INTEGER NOT NULL DEFAULT 0")
+        self._conn.executescript(SCHEMA)
+
+        # _lock guards the pending buffers, _db_lock the connection; take _db_lock first
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._pending_answers = []
+        self._pending_states = {}
+        self._wake = threading.Event()
+
+        self._flusher = threading.Thread(target=self._flush_periodically, name="progress-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+
+    # --- Writes (buffered) ---
+
+    def record_answer(self, user_id, question_id, correct, selected=()):
+        """Log one graded answer; `selected` are the labels of the ticked options."""
+        with self._lock:
+            self._pending_answers.append((
+                user_id, json.dumps(question_id), int(bool(correct)), time.time(), json.dumps(sorted(selected)), 0,
+            ))
+            full = len(self._pending_answers) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def record_answers(self, user_id, answers, late=False):
+        """
+        Log a graded sheet at once: (question_id, correct, selected) triples, one lock round-trip.
+        `late` marks every answer of a sheet handed in after its deadline.
+        """
+        now = time.time()
+        rows = [
+            (user_id, json.dumps(question_id), int(bool(correct)), now, json.dumps(sorted(selected)), int(bool(late)))
+            for question_id, correct, selected in answers
+        ]
+        with self._lock:
+            self._pending_answers.extend(rows)
+            full = len(self._pending_answers) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def save_state(self, user_id, state):
+        """
+        Remember where the user is in the quiz. The keys given are merged into the saved state,
+        so large parts (like the question order) only need to be sent once.
+        """
+        with self._lock:
+            merged = {**self._pending_states.get(user_id, {}), **state}
+            self._pending_states[user_id] = merged
+
+    def flush(self):
+        # Swapping under _db_lock keeps batches on disk in the order they were taken;
+        # appenders only wait on the swap, never on the write
+        with self._db_lock:
+            with self._lock:
+                answers, self._pending_answers = self._pending_answers, []
+                states, self._pending_states = self._pending_states, {}
+            if not answers and not states:
+                return
+            try:
+                self._write(answers, states)
+            except sqlite3.Error:
+                # Put the batch back, newer states win, and let the caller see the error
+                with self._lock:
+                    self._pending_answers[:0] = answers
+                    for user_id, state in self._pending_states.items():
+                        states[user_id] = {**states.get(user_id, {}), **state}
+                    self._pending_states = states
+                raise
+
+    def _write(self, answers, states):
+        with self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT INTO answers (user_id, question_id, correct, answered_at, selected, late) VALUES (?, ?, ?, ?, ?, ?)",
+                answers,
+            )
+            # Applied in order, so the last answer to a question decides whether it stays in the review set
+            for user_id, question_id, correct, answered_at, _, _ in answers:
+                if correct:
+                    self._conn.execute(
+                        "DELETE FROM incorrect WHERE user_id = ? AND question_id = ?", (user_id, question_id)
+                    )
+                else:
+                    self._conn.execute(
+                        "INSERT OR IGNORE INTO incorrect (user_id, question_id) VALUES (?, ?)", (user_id, question_id)
+                    )
+                row = self._conn.execute(
+                    "SELECT box FROM schedule WHERE user_id = ? AND question_id = ?", (user_id, question_id)
+                ).fetchone()
+                box, due_at = next_review(row[0] if row else 0, correct, answered_at)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO schedule (user_id, question_id, box, due_at) VALUES (?, ?, ?, ?)",
+                    (user_id, question_id, box, due_at),
+                )
+            now = time.time()
+            self._conn.executemany(
+                "INSERT INTO quiz_state (user_id, state, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (user_id) DO UPDATE SET state = json_patch(state, excluded.state), "
+                "updated_at = excluded.updated_at",
+                [(user_id, json.dumps(state, ensure_ascii=False), now) for user_id, state in states.items()],
+            )
+
+    def _flush_periodically(self):
+        compacted_at = time.monotonic()
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+                if time.monotonic() - compacted_at >= self.stats_interval:
+                    compacted_at = time.monotonic()
+                    self.compact_stats()
+            except sqlite3.Error:
+                # The batch is back in the queue (answers not yet compacted stay in the log),
+                # try again on the next tick
+                pass
+
+    # --- Statistics (compacted from the log) ---
+
+    def compact_stats(self):
+        """
+        Fold the answers logged since the last compaction into question_stats. Costs time in
+        the number of new answers, not the size of the log. Returns how many were folded.
+        """
+        self.flush()
+        folded = 0
+        while True:
+            with self._db_lock:
+                count = self._compact_batch(COMPACT_BATCH)
+            folded += count
+            if count < COMPACT_BATCH:
+                return folded
+
+    def _compact_batch(self, limit):
+        with self._conn:
+            self._conn.execute("BEGIN")
+            (last_rowid,) = self._conn.execute("SELECT last_rowid FROM stats_state").fetchone()
+            rows = self._conn.execute(
+                "SELECT rowid, question_id, correct, selected FROM answers WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                (last_rowid, limit),
+            ).fetchall()
+            if not rows:
+                return 0
+
+            # question_id -> [attempts, errors, {label: times ticked in a wrong answer}]
+            deltas = {}
+            for _, question_id, correct, selected in rows:
+                delta = deltas.get(question_id)
+                if delta is None:
+                    delta = deltas[question_id] = [0, 0, {}]
+                delta[0] += 1
+                if not correct:
+                    delta[1] += 1
+                    for label in json.loads(selected):
+                        delta[2][label] = delta[2].get(label, 0) + 1
+
+            new_questions = 0
+            for question_id, (attempts, errors, picks) in deltas.items():
+                row = self._conn.execute(
+                    "SELECT attempts, errors, wrong_picks FROM question_stats WHERE question_id = ?", (question_id,)
+                ).fetchone()
+                if row:
+                    attempts += row[0]
+                    errors += row[1]
+                    for label, count in json.loads(row[2]).items():
+                        picks[label] = picks.get(label, 0) + count
+                else:
+                    new_questions += 1
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO question_stats (question_id, attempts, errors, difficulty, wrong_picks) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (question_id, attempts, errors, (errors + 1) / (attempts + 2), json.dumps(picks, sort_keys=True)),
+                )
+            self._conn.execute(
+                "UPDATE stats_state SET last_rowid = ?, answers = answers + ?, questions = questions + ?, "
+                "compacted_at = ?",
+                (rows[-1][0], len(rows), new_questions, time.time()),
+            )
+        return len(rows)
+
+    # --- Reads ---
+
+    def incorrect_ids(self, user_id):
+        """The user's review set, one indexed query."""
+        self.flush()
+        with self._db_lock:
+            rows = self._conn.execute("SELECT question_id FROM incorrect WHERE user_id = ?", (user_id,)).fetchall()
+        return {json.loads(question_id) for (question_id,) in rows}
+
+    def due_questions(self, user_id, until):
+        """(question_id, box, due_at) of the user's questions due before `until`, a range scan of the index."""
+        self.flush()
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT question_id, box, due_at FROM schedule WHERE user_id = ? AND due_at < ?",
+                (user_id, until),
+            ).fetchall()
+        return [(json.loads(question_id), box, due_at) for question_id, box, due_at in rows]
+
+    def stats_overview(self):
+        """(answers compacted, questions answered, time of the last compaction or None), one row read."""
+        with self._db_lock:
+            return self._conn.execute("SELECT answers, questions, compacted_at FROM stats_state").fetchone()
+
+    def hardest_questions(self, limit):
+        """
+        (question_id, attempts, errors, wrong_picks) of the `limit` questions with the highest
+        smoothed error rate, as of the last compaction; reads `limit` rows off the index.
+        """
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT question_id, attempts, errors, wrong_picks FROM question_stats "
+                "ORDER BY difficulty DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [(json.loads(question_id), attempts, errors, json.loads(picks))
+                for question_id, attempts, errors, picks in rows]
+
+    def load_state(self, user_id):
+        self.flush()
+        with self._db_lock:
+            row = self._conn.execute("SELECT state FROM quiz_state WHERE user_id = ?", (user_id,)).fetchone()
+        return json.loads(row[0]) if row else None
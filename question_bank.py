@@ -0,0 +1,201 @@
+"""
+Compact binary question bank (.qbank) with an index, read through mmap.
+
+Layout (little-endian):
+    header      MAGIC, format version, question count, offsets of the two tables below
+    records     one per question: id, text, options, correct answers as a bitmask over
+                the option order, optional JSON with any other fields (e.g. 'sources')
+    offsets     u64 file offset of every record, in bank order
+    id table    (u64 hash of the id, u32 position) pairs sorted by hash
+
+Strings are stored as a varint byte length followed by UTF-8, so question N is decoded
+on demand without touching the rest of the file.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+from collections.abc import Sequence
+
+MAGIC = b"QBNK"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<4sHHIQQ4x")
+_OFFSET = struct.Struct("<Q")
+_ID_ENTRY = struct.Struct("<QI")
+
+def _id_hash(question_id):
+    # JSON keeps 1 and "1" apart
+    key = json.dumps(question_id, ensure_ascii=False).encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _write_bytes(out, data):
+    _write_varint(out, len(data))
+    out += data
+
+def _write_str(out, text):
+    _write_bytes(out, text.encode('utf-8'))
+
+def _read_varint(buf, pos):
+    value = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+def _read_bytes(buf, pos):
+    size, pos = _read_varint(buf, pos)
+    return buf[pos:pos + size], pos + size
+
+def _read_str(buf, pos):
+    data, pos = _read_bytes(buf, pos)
+    return data.decode('utf-8'), pos
+
+def encode_question(q):
+    out = bytearray()
+    _write_bytes(out, json.dumps(q["id"], ensure_ascii=False).encode('utf-8'))
+    _write_str(out, q["text"])
+
+    labels = list(q["options"])
+    _write_varint(out, len(labels))
+    for label in labels:
+        _write_str(out, label)
+        _write_str(out, q["options"][label])
+
+    mask = 0
+    for label in q["correct_answers"]:
+        if label in q["options"]:
+            mask |= 1 << labels.index(label)
+    _write_varint(out, mask)
+
+    # Everything the fixed fields can't represent exactly goes to the JSON extra
+    extra = {k: v for k, v in q.items() if k not in ("id", "text", "options", "correct_answers")}
+    if [label for i, label in enumerate(labels) if mask >> i & 1] != list(q["correct_answers"]):
+        extra["correct_answers"] = q["correct_answers"]
+    _write_bytes(out, json.dumps(extra, ensure_ascii=False).encode('utf-8') if extra else b"")
+    return bytes(out)
+
+def decode_question(buf, pos):
+    raw_id, pos = _read_bytes(buf, pos)
+    text, pos = _read_str(buf, pos)
+
+    count, pos = _read_varint(buf, pos)
+    options = {}
+    for _ in range(count):
+        label, pos = _read_str(buf, pos)
+        options[label], pos = _read_str(buf, pos)
+
+    mask, pos = _read_varint(buf, pos)
+    q = {
+        "id": json.loads(raw_id),
+        "text": text,
+        "options": options,
+        "correct_answers": [label for i, label in enumerate(options) if mask >> i & 1],
+    }
+
+    extra, pos = _read_bytes(buf, pos)
+    if extra:
+        q.update(json.loads(extra))
+    return q
+
+def write_bank(questions, path):
+    """
+    Write questions (any iterable, consumed once) to a .qbank file.
+    Only the offsets and id hashes are kept in memory; the file is replaced atomically.
+    """
+    tmp_path = path + ".tmp"
+    offsets = []
+    ids = []
+    with open(tmp_path, "wb") as f:
+        f.write(b"\0" * _HEADER.size)
+        for q in questions:
+            offsets.append(f.tell())
+            ids.append(_id_hash(q["id"]))
+            f.write(encode_question(q))
+
+        index_offset = f.tell()
+        for offset in offsets:
+            f.write(_OFFSET.pack(offset))
+
+        ids_offset = f.tell()
+        for id_hash, position in sorted(zip(ids, range(len(ids)))):
+            f.write(_ID_ENTRY.pack(id_hash, position))
+
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(offsets), index_offset, ids_offset))
+    os.replace(tmp_path, path)
+    return len(offsets)
+
+class QuestionBank(Sequence):
+    """
+    Read-only view of a .qbank file. Questions are decoded from the memory map on access,
+    bank[n] by position and get()/index_of() by id through the sorted id table.
+    """
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < _HEADER.size:
+            raise ValueError(f"'{path}' is not a question bank file")
+        magic, version, _, count, index_offset, ids_offset = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"'{path}' is not a question bank file (version {FORMAT_VERSION})")
+        self._count = count
+        self._index_offset = index_offset
+        self._ids_offset = ids_offset
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, n):
+        if isinstance(n, slice):
+            return [self[i] for i in range(*n.indices(self._count))]
+        if n < 0:
+            n += self._count
+        if not 0 <= n < self._count:
+            raise IndexError("question index out of range")
+        (offset,) = _OFFSET.unpack_from(self._mm, self._index_offset + n * _OFFSET.size)
+        return decode_question(self._mm, offset)
+
+    def question_id(self, n):
+        """Id of question n without decoding the rest of the record."""
+        (offset,) = _OFFSET.unpack_from(self._mm, self._index_offset + n * _OFFSET.size)
+        raw_id, _ = _read_bytes(self._mm, offset)
+        return json.loads(raw_id)
+
+    def index_of(self, question_id):
+        """Position of the question with this id, or None. Binary search over the id table."""
+        target = _id_hash(question_id)
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            id_hash, _ = _ID_ENTRY.unpack_from(self._mm, self._ids_offset + mid * _ID_ENTRY.size)
+            if id_hash < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        # Equal hashes are adjacent; compare the real ids to rule out collisions
+        while lo < self._count:
+            id_hash, position = _ID_ENTRY.unpack_from(self._mm, self._ids_offset + lo * _ID_ENTRY.size)
+            if id_hash != target:
+                break
+            if self.question_id(position) == question_id:
+                return position
+            lo += 1
+        return None
+
+    def get(self, question_id, default=None):
+        n = self.index_of(question_id)
+        return default if n is None else self[n]
+
+    def close(self):
+        self._mm.close()
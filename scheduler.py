@@ -0,0 +1,95 @@
+"""
+Leitner spaced repetition.
+
+Every answered question sits in a box: a correct answer moves it one box up, a wrong one
+back to box 0, and the box decides when it is due again. The schedule itself is kept by
+ProgressStore; a session only holds the questions due today, in a DueQueue.
+"""
+import datetime
+import heapq
+import itertools
+
+DAY = 24 * 60 * 60
+
+# Days until the next review for each box; box 0 (answered wrong) is due again right away.
+# Every box above 0 waits at least a day, so a correct answer always leaves today's queue.
+LEITNER_INTERVALS = (0, 1, 2, 4, 8, 16, 32, 64)
+
+def next_review(box, correct, answered_at):
+    """New (box, due_at) of a question in `box` answered at `answered_at` (unix time)."""
+    box = min(box + 1, len(LEITNER_INTERVALS) - 1) if correct else 0
+    return box, answered_at + LEITNER_INTERVALS[box] * DAY
+
+def end_of_day(now):
+    """Unix time of the next local midnight."""
+    tomorrow = datetime.date.fromtimestamp(now) + datetime.timedelta(days=1)
+    return datetime.datetime.combine(tomorrow, datetime.time()).timestamp()
+
+class DueQueue:
+    """
+    Questions due before `until`, in a min-heap keyed by due time.
+
+    Rescheduling pushes a new entry and leaves the old one in the heap; stale entries are
+    recognized by their sequence number and skipped, and the heap is rebuilt once they
+    outnumber the live ones. Getting the next N due questions costs O(N log n).
+    """
+    def __init__(self, until, entries=()):
+        self.until = until
+        # question id -> (box, heap entry)
+        self._live = {}
+        self._heap = []
+        # Tie-breaker and version of an entry, so ids (which may not be comparable) are never compared
+        self._seq = itertools.count()
+        for question_id, box, due_at in entries:
+            self._heap.append(self._entry(question_id, box, due_at))
+        heapq.heapify(self._heap)
+
+    def __len__(self):
+        return len(self._live)
+
+    def __contains__(self, question_id):
+        return question_id in self._live
+
+    def _entry(self, question_id, box, due_at):
+        entry = (due_at, next(self._seq), question_id)
+        self._live[question_id] = (box, entry)
+        return entry
+
+    def _is_live(self, entry):
+        live = self._live.get(entry[2])
+        return live is not None and live[1] == entry
+
+    def review(self, question_id, correct, answered_at):
+        """
+        Apply an answer. Questions not in the queue count as box 0 here; a wrong answer puts
+        them in box 0 anyway and a correct one schedules them past today either way.
+        """
+        box, _ = self._live.get(question_id, (0, None))
+        box, due_at = next_review(box, correct, answered_at)
+        if due_at < self.until:
+            heapq.heappush(self._heap, self._entry(question_id, box, due_at))
+        else:
+            self._live.pop(question_id, None)
+        if len(self._heap) > 2 * len(self._live) + 64:
+            self._heap = [entry for entry in self._heap if self._is_live(entry)]
+            heapq.heapify(self._heap)
+
+    def next_due(self, n, now=None):
+        """
+        Ids of up to n questions due by `now` (default: the end of the queue's day), most overdue
+        first. They stay in the queue until they are answered.
+        """
+        now = self.until if now is None else now
+        taken = []
+        while self._heap and len(taken) < n:
+            entry = heapq.heappop(self._heap)
+            if not self._is_live(entry):
+                # Stale entry of a rescheduled or answered question, dropped for good
+                continue
+            if entry[0] > now:
+                heapq.heappush(self._heap, entry)
+                break
+            taken.append(entry)
+        for entry in taken:
+            heapq.heappush(self._heap, entry)
+        return [entry[2] for entry in taken]
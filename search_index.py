@@ -0,0 +1,101 @@
+"""
+Inverted index for full-text search over question and option text.
+
+Text is lowercased, Polish diacritics are folded (ż -> z, ł -> l, ...) and every word is
+cut down to a crude stem by stripping the longest known inflectional ending, so
+"zażalenie", "zażalenia" and "zażaleniem" all index as "zazalen". Queries are normalized
+the same way, so the stems only have to be consistent, not linguistically right.
+
+Every stem maps to a sorted array of question positions; a query intersects the postings
+of its terms, shortest first, and never looks at the questions themselves.
+"""
+import re
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+
+import numpy as np
+
+_FOLD = str.maketrans("ąćęłńóśźż", "acelnoszz")
+# Letters and digits of any script; folding happens per distinct word
+_WORD = re.compile(r"[^\W_]+")
+
+# Common noun and adjective endings after folding, longest first
+_SUFFIXES = sorted(
+    """
+    iami iach ami ach iem iom owi ow om em ie ia iu ego emu ymi imi ych ich ej ym im
+    a e i o u y
+    """.split(),
+    key=len,
+    reverse=True,
+)
+MIN_STEM = 3
+
+# A bank has far fewer distinct words than word occurrences, so both steps are memoized
+@lru_cache(maxsize=1 << 17)
+def fold(word):
+    return word.translate(_FOLD)
+
+def normalize(text):
+    """Lowercase, diacritic-free words of the text."""
+    return [fold(word) for word in _WORD.findall(text.lower())]
+
+@lru_cache(maxsize=1 << 17)
+def stem(word):
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM:
+            return word[:-len(suffix)]
+    return word
+
+def terms(text):
+    return [stem(word) for word in normalize(text)]
+
+class SearchIndex:
+    """
+    Postings (stem -> array of positions) over an iterable of texts, one per question,
+    in bank order.
+    """
+    def __init__(self, texts):
+        postings = {}
+        count = 0
+        for position, text in enumerate(texts):
+            # Distinct words first, most of a question's words repeat
+            for term in {stem(fold(word)) for word in set(_WORD.findall(text.lower()))}:
+                positions = postings.get(term)
+                if positions is None:
+                    positions = postings[term] = array('I')
+                # Positions arrive in increasing order, so every array is sorted
+                positions.append(position)
+            count = position + 1
+        self._postings = postings
+        self._vocabulary = sorted(postings)
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def _positions(self, term):
+        positions = self._postings.get(term)
+        if positions is not None:
+            return np.frombuffer(positions, dtype=np.uint32)
+        # Unknown stem, e.g. a word still being typed: all terms starting with it
+        lo = bisect_left(self._vocabulary, term)
+        hi = bisect_left(self._vocabulary, term + "\uffff")
+        if lo == hi:
+            return np.empty(0, dtype=np.uint32)
+        return np.unique(np.concatenate([
+            np.frombuffer(self._postings[t], dtype=np.uint32) for t in self._vocabulary[lo:hi]
+        ]))
+
+    def search(self, query):
+        """Positions of the questions containing every word of the query, in bank order."""
+        query_terms = set(terms(query))
+        if not query_terms:
+            return []
+        postings = sorted((self._positions(term) for term in query_terms), key=len)
+        result = postings[0]
+        for positions in postings[1:]:
+            if not len(result):
+                break
+            result = np.intersect1d(result, positions, assume_unique=True)
+        return result.tolist()
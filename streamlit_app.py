@@ -1,81 +1,79 @@
 import streamlit as st
 import json
+import os
+import hashlib
+import hmac
+import math
 import random
+import threading
+import time
+import uuid
+from array import array
+from collections import namedtuple
+from types import MappingProxyType
+
+import numpy as np
+
+from exam import (DEFAULT_LATE_POLICY, DEFAULT_RULE, LATE_GRACE, LATE_POLICIES, SCORING_RULES, apply_late_policy,
+                  popcount, score_sheet)
+from progress_store import ProgressStore
+from question_bank import QuestionBank
+from scheduler import DueQueue, end_of_day
+from search_index import SearchIndex
+from timings import TIMINGS
 
 # --- CSS i stylizacja ---
-# Wstrzyknięcie własnego CSS, aby nadać aplikacji nowoczesny, "SaaS-owy" wygląd.
-# Używamy zmiennych CSS dla łatwiejszej zmiany kolorów.
-st.markdown("""
-<style>
-    /* Google Fonts */
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap');
-
-    :root {
-        --primary-color: #2563EB; /* Niebieski 'korpo' */
-        --secondary-color: #1E293B; /* Ciemny szary/granat */
-        --accent-color: #10B981; /* Zielony akcent */
-        --text-color: #334155;
-        --bg-color: #F8FAFC;
-        --card-bg: #FFFFFF;
-        --shadow-sm: 0 1px 2px 0 rgb(0 0 0 / 0.05);
-        --shadow-md: 0 4px 6px -1px rgb(0 0 0 / 0.1), 0 2px 4px -2px rgb(0 0 0 / 0.1);
-    }
-    
-    html, body, [class*="css"] {
-        font-family: 'Inter', sans-serif;
-    }
-
-    /* Tło aplikacji */
-    .stApp {
-        background-color: var(--bg-color);
-        color: var(--text-color);
-    }
-
-    /* Nagłówek i Sidebar */
-    [data-testid="stSidebar"] {
-        background-color: white;
-        border-right: 1px solid #E2E8F0;
-    }
-    
-    h1, h2, h3 {
-        color: var(--secondary-color);
-        font-weight: 700;
-    }
-
-    /* Karty (Cards) */
-    .stCard {
-        background-color: var(--card-bg);
-        border-radius: 12px;
-        padding: 24px;
-        box-shadow: var(--shadow-md);
-        margin-bottom: 24px;
-        border: 1px solid #E2E8F0;
-    }
-
-    /* Przyciski */
-    .stButton > button {
-        border-radius: 8px;
-        font-weight: 600;
-        padding: 0.5rem 1rem;
-        transition: all 0.2s ease-in-out;
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-1px);
-        box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1);
-    }
-
-    /* Usuwamy domyślne menu Streamlit dla czystszego wyglądu (opcjonalne) */
-    /* #MainMenu {visibility: hidden;} */
-    /* footer {visibility: hidden;} */
-</style>
-""", unsafe_allow_html=True)
-
-# --- Stała z nazwą pliku ---
+# Arkusz stylów (zmienne CSS dla łatwiejszej zmiany kolorów), czcionka i ikona leżą w static/
+# i serwuje je sam Streamlit (server.enableStaticServing w .streamlit/config.toml), więc pierwsze
+# wyświetlenie nie czeka na Google Fonts ani zewnętrzny CDN i działa bez dostępu do sieci.
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+@st.cache_resource
+def static_url(name):
+    # Skrót zawartości w adresie: przeglądarka może trzymać plik w cache tak długo, jak chce,
+    # a po zmianie pliku (i restarcie serwera) dostaje nowy adres zamiast starej kopii
+    with open(os.path.join(STATIC_DIR, name), 'rb') as f:
+        digest = hashlib.sha1(f.read()).hexdigest()[:12]
+    return f"/app/static/{name}?v={digest}"
+
+# Zamiast ~2 KB CSS w każdym przebiegu skryptu tylko @import pliku z cache przeglądarki.
+# Element musi być wysłany przy każdym przebiegu (Streamlit usuwa elementy, których przebieg
+# nie wyrenderował), ale treść się nie zmienia, więc arkusz jest pobierany raz na sesję.
+st.markdown(f"<style>@import url('{static_url('style.css')}');</style>", unsafe_allow_html=True)
+
+# --- Stałe z nazwami plików ---
 LOCAL_QUESTIONS_FILE = "baza_pytan.json"
+# Binarny indeks generowany przez extract_questions.py --binary (opcjonalny)
+LOCAL_QUESTIONS_BANK = "baza_pytan.qbank"
+# Baza SQLite z postępami użytkowników
+PROGRESS_DB = "progress.db"
+# Najwięcej pytań w jednej sesji "Na dziś"
+DUE_SESSION_SIZE = 20
+# Ekrany, na których sesja zostaje przy wersji bazy, na której zaczęła (pozycje i maski pytań
+# w stanie sesji dotyczą tej wersji)
+BANK_PINNED_SCREENS = ('quiz', 'summary', 'exam', 'exam_result')
+# Ile najtrudniejszych pytań pokazuje panel prowadzącego
+INSTRUCTOR_TOP = 20
+# Parametr adresu, którym prowadzący podaje swój klucz (?instructor=...)
+INSTRUCTOR_PARAM = "instructor"
+# Egzamin: domyślna długość i czas, co ile sekund odświeża się licznik czasu
+EXAM_DEFAULT_QUESTIONS = 30
+EXAM_DEFAULT_MINUTES = 30
+EXAM_TIMER_REFRESH = 15
+# Nazwy zasad oceniania z exam.SCORING_RULES
+EXAM_RULE_LABELS = {
+    "all_or_nothing": "Wszystko albo nic",
+    "proportional": "Częściowe punkty (bez błędnych zaznaczeń)",
+    "penalized": "Częściowe punkty, błędne zaznaczenia odejmują",
+}
+# Nazwy zasad dla arkusza oddanego po czasie (exam.LATE_POLICIES)
+EXAM_LATE_LABELS = {
+    "zero": "Po czasie: 0 punktów",
+    "reject": "Po czasie: arkusz nie jest przyjmowany",
+}
 
 # --- Funkcje (wczytywanie, logika) ---
-@st.cache_data
+# Bez st.cache_data (kopia danych dla każdego wywołania) - wynik trafia do współdzielonego QuizLogic
 def load_questions_from_local_file(filepath):
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
@@ -86,11 +84,182 @@ def load_questions_from_local_file(filepath):
     except json.JSONDecodeError:
         return None, f"Błąd: Nie można przetworzyć pliku JSON ('{filepath}')."
 
-def initialize_session_state():
+def load_question_bank(filepath):
+    try:
+        return QuestionBank(filepath)
+    except (OSError, ValueError):
+        return None
+
+def load_questions(bank_path, json_path):
+    # Najpierw binarny indeks - pytania są dekodowane na żądanie, bez parsowania całego JSON-a.
+    # Używamy go tylko, jeśli nie jest starszy od pliku JSON.
+    try:
+        bank_mtime = os.path.getmtime(bank_path)
+        if not os.path.exists(json_path) or bank_mtime >= os.path.getmtime(json_path):
+            bank = load_question_bank(bank_path)
+            if bank is not None:
+                return bank, None
+    except OSError:
+        pass
+    return load_questions_from_local_file(json_path)
+
+def _files_mtime(*paths):
+    return tuple(os.path.getmtime(path) if os.path.exists(path) else None for path in paths)
+
+def _files_hash(*paths):
+    digest = hashlib.sha256()
+    for path in paths:
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+class BankRegistry:
+    """
+    Aktualna wersja bazy pytań dla całego procesu: jedna niezmienna instancja QuizLogic
+    współdzielona przez wszystkie sesje. Zmiana pliku (mtime, potem hash treści) buduje
+    nową wersję w wątku w tle i podmienia ją atomowo, z kolejnym numerem wersji.
+    """
+    def __init__(self, bank_path, json_path, check_interval=2.0):
+        self.bank_path = bank_path
+        self.json_path = json_path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._reloading = False
+        self._last_check = time.monotonic()
+        self._mtimes = _files_mtime(bank_path, json_path)
+        self._digest = _files_hash(bank_path, json_path)
+        quiz_logic, error_message = self._build()
+        # (wersja, QuizLogic, błąd) - podmieniane jednym przypisaniem
+        self._current = (1, quiz_logic, error_message)
+        if quiz_logic is not None:
+            # Indeks wyszukiwania w tle - pierwsza sesja nie czeka, wyszukiwanie najwyżej poczeka na koniec budowy
+            threading.Thread(target=quiz_logic.search_index, name="search-index", daemon=True).start()
+
+    def _build(self):
+        questions_data, error_message = load_questions(self.bank_path, self.json_path)
+        if error_message:
+            return None, error_message
+        return QuizLogic(questions_list=questions_data), None
+
+    def current(self):
+        self._check_for_changes()
+        return self._current
+
+    def _check_for_changes(self):
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        mtimes = _files_mtime(self.bank_path, self.json_path)
+        if mtimes == self._mtimes:
+            return
+        # Tylko jedno przeładowanie na zmianę, niezależnie od liczby sesji
+        with self._lock:
+            if self._reloading:
+                return
+            self._reloading = True
+        threading.Thread(target=self._reload, args=(mtimes,), name="bank-reload", daemon=True).start()
+
+    def _reload(self, mtimes):
+        try:
+            digest = _files_hash(self.bank_path, self.json_path)
+            if digest != self._digest:
+                quiz_logic, error_message = self._build()
+                version, current_logic, _ = self._current
+                if quiz_logic is not None:
+                    # Jesteśmy już w wątku w tle - nowa wersja trafia do sesji z gotowym indeksem
+                    quiz_logic.search_index()
+                    self._current = (version + 1, quiz_logic, None)
+                elif current_logic is None:
+                    self._current = (version, None, error_message)
+                # Zepsuty plik przy działającej bazie - zostajemy przy starej wersji
+            self._digest = digest
+            self._mtimes = mtimes
+        finally:
+            self._reloading = False
+
+@st.cache_resource
+def get_bank_registry(bank_path, json_path):
+    return BankRegistry(bank_path, json_path)
+
+def pin_quiz_logic(registry):
+    # Sesja w trakcie quizu lub egzaminu kończy go na wersji bazy, na której zaczęła;
+    # nowe sesje i powrót do menu przechodzą na najnowszą wersję
+    version, latest, error_message = registry.current()
+    pinned = st.session_state.get('quiz_logic')
+    if pinned is not None and (
+        st.session_state.bank_version == version or st.session_state.get('screen') in BANK_PINNED_SCREENS
+    ):
+        return pinned, None
+    if latest is None:
+        return None, error_message
+    if pinned is not None and 'incorrect_bitmap' in st.session_state:
+        # Pozycje w bitmapie dotyczą starej wersji bazy - przenosimy błędy przez id pytań
+        wrong_ids = [pinned.question_id(n) for n in bitmap_indices(st.session_state.incorrect_bitmap)]
+        st.session_state.incorrect_bitmap = latest.bitmap_from_ids(wrong_ids)
+    st.session_state.quiz_logic = latest
+    st.session_state.bank_version = version
+    return latest, None
+
+# Jeden magazyn postępów (jedno połączenie SQLite) na cały proces serwera
+@st.cache_resource
+def get_progress_store(path):
+    return ProgressStore(path)
+
+def _current_user_id():
+    # Identyfikator użytkownika trzymamy w adresie (?u=...), więc odświeżenie strony go nie gubi
+    user_id = st.query_params.get("u")
+    if not user_id:
+        user_id = uuid.uuid4().hex
+        st.query_params["u"] = user_id
+    return user_id
+
+def save_progress(quiz_logic=None):
+    # Zapis jest buforowany w ProgressStore, więc można go wołać przy każdej zmianie pozycji.
+    # Kolejność pytań (quiz_logic podany) zapisujemy tylko na starcie quizu, potem wystarczy pozycja.
+    state = {
+        "screen": st.session_state.screen,
+        "current_question_index": st.session_state.current_question_index,
+        "score": st.session_state.score,
+        "newly_incorrect_count": st.session_state.newly_incorrect_count,
+    }
+    if quiz_logic is not None:
+        state["question_ids"] = [quiz_logic.question_id(n) for n in st.session_state.question_order]
+    get_progress_store(PROGRESS_DB).save_state(st.session_state.user_id, state)
+
+def restore_progress(quiz_logic, state):
+    if not state or state.get("screen") not in ('quiz', 'summary'):
+        return
+    order = quiz_logic.pool_from_ids(state.get("question_ids", []))
+    if not order:
+        return
+    st.session_state.screen = state["screen"]
+    st.session_state.question_order = array('I', order)
+    st.session_state.current_question_index = min(state["current_question_index"], len(order) - 1)
+    st.session_state.score = state["score"]
+    st.session_state.newly_incorrect_count = state["newly_incorrect_count"]
+    st.session_state.answer_submitted = False
+    st.session_state.score_calculated = False
+    st.session_state.user_selection = []
+
+def load_due_queue(store, user_id):
+    # W sesji trzymamy tylko pytania zaplanowane do końca dnia; reszta harmonogramu zostaje w bazie
+    until = end_of_day(time.time())
+    return DueQueue(until, store.due_questions(user_id, until))
+
+def initialize_session_state(quiz_logic, store):
+    if 'user_id' not in st.session_state:
+        # Nowa sesja (np. po odświeżeniu strony) - wczytujemy zapisany postęp użytkownika
+        st.session_state.user_id = _current_user_id()
+        st.session_state.incorrect_bitmap = quiz_logic.bitmap_from_ids(store.incorrect_ids(st.session_state.user_id))
+        restore_progress(quiz_logic, store.load_state(st.session_state.user_id))
     if 'screen' not in st.session_state:
         st.session_state.screen = 'menu'
-    if 'incorrect_ids' not in st.session_state:
-        st.session_state.incorrect_ids = set()
+    if 'incorrect_bitmap' not in st.session_state:
+        st.session_state.incorrect_bitmap = new_bitmap(len(quiz_logic))
     # Inicjalizacja domyślnych wartości jeśli nie istnieją
     if 'score' not in st.session_state:
         st.session_state.score = 0
@@ -98,14 +267,146 @@ def initialize_session_state():
         st.session_state.current_question_index = 0
     if 'newly_incorrect_count' not in st.session_state:
         st.session_state.newly_incorrect_count = 0 
-    if 'questions_to_ask' not in st.session_state:
-        st.session_state.questions_to_ask = []
+    if 'question_order' not in st.session_state:
+        st.session_state.question_order = array('I')
+    # Kolejka "Na dziś" - wczytywana na starcie sesji i po północy
+    if 'due_queue' not in st.session_state or time.time() >= st.session_state.due_queue.until:
+        st.session_state.due_queue = load_due_queue(store, st.session_state.user_id)
+
+# --- Bitmapa błędnych odpowiedzi: bit n = pytanie n w bazie ---
+def new_bitmap(size):
+    return bytearray((size + 7) // 8)
+
+def bitmap_get(bitmap, n):
+    return bool(bitmap[n >> 3] & (1 << (n & 7)))
+
+def bitmap_set(bitmap, n, value):
+    if value:
+        bitmap[n >> 3] |= 1 << (n & 7)
+    else:
+        bitmap[n >> 3] &= ~(1 << (n & 7)) & 0xFF
+
+def bitmap_count(bitmap):
+    return int.from_bytes(bitmap, "little").bit_count()
+
+def bitmap_indices(bitmap):
+    bits = np.unpackbits(np.frombuffer(bytes(bitmap), dtype=np.uint8), bitorder="little")
+    return np.flatnonzero(bits).tolist()
+
+# Pytanie przygotowane do wyświetlania i oceniania - liczone raz na wczytanie bazy
+PreparedQuestion = namedtuple(
+    "PreparedQuestion",
+    ["index", "id", "text", "options", "labels", "option_texts", "correct", "correct_mask"],
+)
+
+def _freeze_question(q):
+    return MappingProxyType({
+        **q,
+        "options": MappingProxyType(dict(q["options"])),
+        "correct_answers": tuple(q["correct_answers"]),
+    })
 
 class QuizLogic:
     def __init__(self, questions_list):
-        self.questions = questions_list
-
-def start_quiz(quiz_logic, review_only=False, num_questions=None):
+        # Mapa id -> pozycja w bazie; binarny indeks (QuestionBank) jest tylko do odczytu
+        # i ma własne wyszukiwanie po id
+        if isinstance(questions_list, QuestionBank):
+            self.questions = questions_list
+            self._index_by_id = None
+        else:
+            # Baza jest współdzielona przez wszystkie sesje, więc nie może dać się zmienić
+            self.questions = tuple(_freeze_question(q) for q in questions_list)
+            self._index_by_id = MappingProxyType({q["id"]: n for n, q in enumerate(self.questions)})
+        # Przygotowane pytania powstają przy pierwszym użyciu i zostają do końca życia bazy,
+        # dzięki temu leniwie wczytywana baza nie jest dekodowana w całości
+        self._prepared = [None] * len(questions_list)
+        # Indeks pełnotekstowy (treść pytania i opcji) - budowany raz na wersję bazy
+        self._search_index = None
+        self._search_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.questions)
+
+    def index_of(self, question_id):
+        if self._index_by_id is None:
+            return self.questions.index_of(question_id)
+        return self._index_by_id.get(question_id)
+
+    def question_id(self, index):
+        # Bez dekodowania całego rekordu binarnego indeksu
+        p = self._prepared[index]
+        if p is not None:
+            return p.id
+        if self._index_by_id is None:
+            return self.questions.question_id(index)
+        return self.questions[index]["id"]
+
+    def prepared(self, index):
+        p = self._prepared[index]
+        if p is None:
+            q = self.questions[index]
+            labels = tuple(sorted(q["options"]))
+            correct = frozenset(q["correct_answers"])
+            p = PreparedQuestion(
+                index=index,
+                id=q["id"],
+                text=q["text"],
+                options=MappingProxyType(dict(q["options"])),
+                labels=labels,
+                option_texts=tuple(f"{key}) {q['options'][key]}" for key in labels),
+                correct=correct,
+                # Odpowiedź spoza listy opcji nie da się zaznaczyć - takiej maski nic nie osiągnie
+                correct_mask=self.selection_mask(labels, correct) if correct <= set(labels) else -1,
+            )
+            self._prepared[index] = p
+        return p
+
+    @staticmethod
+    def selection_mask(labels, selected):
+        # Bit i odpowiada i-tej opcji w kolejności labels
+        mask = 0
+        for bit, key in enumerate(labels):
+            if key in selected:
+                mask |= 1 << bit
+        return mask
+
+    def is_correct(self, p, selected):
+        return self.selection_mask(p.labels, selected) == p.correct_mask
+
+    # Pule pytań to listy pozycji w bazie - koszt zależy od wielkości puli, nie całej bazy
+    def full_pool(self):
+        return list(range(len(self)))
+
+    def random_pool(self, num_questions):
+        return random.sample(range(len(self)), min(num_questions, len(self)))
+
+    def review_pool(self, bitmap):
+        return bitmap_indices(bitmap)
+
+    def search_index(self):
+        if self._search_index is None:
+            with self._search_lock:
+                if self._search_index is None:
+                    self._search_index = SearchIndex(
+                        " ".join([q["text"], *q["options"].values()]) for q in self.questions
+                    )
+        return self._search_index
+
+    def search_pool(self, query):
+        # Pozycje pytań zawierających wszystkie słowa zapytania (bez odmiany i polskich znaków)
+        return self.search_index().search(query)
+
+    def pool_from_ids(self, question_ids):
+        indices = (self.index_of(question_id) for question_id in question_ids)
+        return [n for n in indices if n is not None]
+
+    def bitmap_from_ids(self, question_ids):
+        bitmap = new_bitmap(len(self))
+        for n in self.pool_from_ids(question_ids):
+            bitmap_set(bitmap, n, True)
+        return bitmap
+
+def start_quiz(quiz_logic, review_only=False, num_questions=None, due_only=False, search_query=None):
     st.session_state.score = 0
     st.session_state.current_question_index = 0
     st.session_state.newly_incorrect_count = 0
@@ -114,33 +415,108 @@ def start_quiz(quiz_logic, review_only=False, num_questions=None):
     st.session_state.user_selection = []
     
     if review_only:
-        incorrect_ids_in_session = st.session_state.get('incorrect_ids', set())
-        if not incorrect_ids_in_session:
+        if not bitmap_count(st.session_state.incorrect_bitmap):
             st.toast("Brak pytań do powtórki.", icon="🎉")
             return
-        questions_pool = [q for q in quiz_logic.questions if q["id"] in incorrect_ids_in_session]
+        questions_pool = quiz_logic.review_pool(st.session_state.incorrect_bitmap)
+    elif due_only:
+        # Najbardziej zaległe najpierw - z kopca, bez przeglądania całej bazy
+        due_ids = st.session_state.due_queue.next_due(num_questions or DUE_SESSION_SIZE)
+        questions_pool = quiz_logic.pool_from_ids(due_ids)
+        if not questions_pool:
+            st.toast("Na dziś nie ma nic do powtórki.", icon="🎉")
+            return
+    elif search_query:
+        questions_pool = quiz_logic.search_pool(search_query)
+        if not questions_pool:
+            st.toast("Żadne pytanie nie pasuje do wyszukiwania.", icon="🔍")
+            return
     elif num_questions:
-        questions_pool = random.sample(quiz_logic.questions, min(num_questions, len(quiz_logic.questions)))
+        questions_pool = quiz_logic.random_pool(num_questions)
     else:
-        questions_pool = quiz_logic.questions[:]
+        questions_pool = quiz_logic.full_pool()
 
     if not questions_pool:
         st.error("Wystąpił błąd przy tworzeniu puli pytań.")
         return
 
-    random.shuffle(questions_pool)
-    st.session_state.questions_to_ask = questions_pool
+    if not due_only:
+        random.shuffle(questions_pool)
+    # Sesja trzyma tylko zwartą tablicę pozycji w bazie, pytania są we współdzielonym QuizLogic
+    st.session_state.question_order = array('I', questions_pool)
     st.session_state.screen = 'quiz'
+    save_progress(quiz_logic)
+
+def start_exam(quiz_logic, num_questions, minutes, rule, late_policy=DEFAULT_LATE_POLICY):
+    # Egzamin: cały arkusz w jednym formularzu, ocena dopiero po oddaniu
+    pool = quiz_logic.random_pool(num_questions)
+    prepared = [quiz_logic.prepared(n) for n in pool]
+    st.session_state.exam_order = array('I', pool)
+    # Id pytań arkusza - pod nimi trafiają do dziennika i harmonogramu odpowiedzi
+    st.session_state.exam_question_ids = [p.id for p in prepared]
+    # Maski poprawnych i wszystkich opcji liczone raz, na starcie - ocena to już tylko operacje na tablicach
+    st.session_state.exam_correct = np.array([p.correct_mask for p in prepared], dtype=np.int64)
+    st.session_state.exam_options = np.array([(1 << len(p.labels)) - 1 for p in prepared], dtype=np.int64)
+    st.session_state.exam_rule = rule
+    st.session_state.exam_late_policy = late_policy
+    st.session_state.exam_started = time.time()
+    st.session_state.exam_deadline = st.session_state.exam_started + minutes * 60
+    st.session_state.exam_result = None
+    # Nowe klucze checkboxów dla każdego egzaminu, żeby nie przejąć zaznaczeń z poprzedniego
+    st.session_state.exam_id = uuid.uuid4().hex[:8]
+    st.session_state.screen = 'exam'
+
+def grade_exam(quiz_logic):
+    # Callback przycisku "Oddaj arkusz": działa przed przebiegiem skryptu, więc ocena i wyniki
+    # to jeden rerun niezależnie od liczby pytań
+    order = st.session_state.exam_order
+    exam_id = st.session_state.exam_id
+    # Maski zaznaczeń z checkboxów formularza - jedyna pętla po pytaniach przy ocenianiu
+    selected = np.zeros(len(order), dtype=np.int64)
+    for i, count in enumerate(popcount(st.session_state.exam_options).tolist()):
+        mask = 0
+        for bit in range(count):
+            if st.session_state.get(f"ex_{exam_id}_{i}_{bit}"):
+                mask |= 1 << bit
+        selected[i] = mask
+
+    # Punkty za cały arkusz naraz, według wybranej zasady; po terminie (i czasie na spóźnione
+    # kliknięcie) według zasady dla spóźnionych - zero punktów albo arkusz odrzucony (None)
+    now = time.time()
+    late_by = now - st.session_state.exam_deadline
+    late = late_by > LATE_GRACE
+    correct = st.session_state.exam_correct
+    scores = apply_late_policy(
+        score_sheet(selected, correct, st.session_state.exam_options, st.session_state.exam_rule),
+        late_by, st.session_state.exam_late_policy,
+    )
+    st.session_state.exam_result = {"selected": selected, "scores": scores, "submitted_at": now, "late": late}
+    st.session_state.screen = 'exam_result'
+    if scores is None:
+        # Odrzucony arkusz nie trafia ani do dziennika, ani do powtórek
+        return
+
+    # Do dziennika, powtórek i harmonogramu liczy się tylko odpowiedź w pełni poprawna (także
+    # w arkuszu wyzerowanym za spóźnienie - to wciąż informacja o tym, co student umie)
+    fully_correct = selected == correct
+    answers = []
+    question_ids = st.session_state.exam_question_ids
+    for n, question_id, mask, is_correct in zip(order, question_ids, selected.tolist(), fully_correct.tolist()):
+        labels = quiz_logic.prepared(n).labels
+        answers.append((question_id, is_correct, [key for bit, key in enumerate(labels) if mask >> bit & 1]))
+        bitmap_set(st.session_state.incorrect_bitmap, n, not is_correct)
+        st.session_state.due_queue.review(question_id, is_correct, now)
+    get_progress_store(PROGRESS_DB).record_answers(st.session_state.user_id, answers, late=late)
 
 # --- Ekrany ---
 
 def sidebar_status():
     with st.sidebar:
-        st.image("https://cdn-icons-png.flaticon.com/512/2641/2641457.png", width=64) # Generyczna ikona dokumentu/prawa
+        st.image(static_url('icon.svg'), width=64) # Ikona dokumentu/prawa z static/
         st.title("Panel Kontrolny")
         
         if st.session_state.screen == 'quiz':
-            total = len(st.session_state.questions_to_ask)
+            total = len(st.session_state.question_order)
             current = st.session_state.current_question_index + 1
             progress = st.session_state.current_question_index / total if total > 0 else 0
             
@@ -150,16 +526,60 @@ def sidebar_status():
             st.markdown(f"**Wynik:** {st.session_state.score}")
             st.markdown("---")
             if st.button("Przerwij Quiz", use_container_width=True, type="secondary"):
+                st.session_state.screen = 'menu'
+                save_progress()
+                st.rerun()
+        elif st.session_state.screen == 'exam':
+            st.markdown(f"**Pytania:** {len(st.session_state.exam_order)}")
+            st.markdown(f"**Ocenianie:** {EXAM_RULE_LABELS[st.session_state.exam_rule]}")
+            st.markdown(f"**{EXAM_LATE_LABELS[st.session_state.exam_late_policy]}**")
+            st.markdown("---")
+            if st.button("Przerwij egzamin", use_container_width=True, type="secondary"):
                 st.session_state.screen = 'menu'
                 st.rerun()
         else:
             st.markdown("Witaj w systemie testowym Postępowanie w sprawach nieletnich.")
             st.markdown("Wybierz tryb quizu z menu głównego.")
 
-            incorrect_cnt = len(st.session_state.get('incorrect_ids', set()))
+            incorrect_cnt = bitmap_count(st.session_state.incorrect_bitmap)
             if incorrect_cnt > 0:
                 st.warning(f"Masz {incorrect_cnt} pytań do powtórki.")
 
+            st.markdown("---")
+            if is_instructor() and st.session_state.screen != 'instructor':
+                if st.button("📊 Statystyki pytań", use_container_width=True, type="secondary"):
+                    st.session_state.screen = 'instructor'
+                    st.rerun()
+
+def instructor_key():
+    # Klucz prowadzącego: zmienna środowiskowa QUIZ_INSTRUCTOR_KEY albo instructor_key w
+    # .streamlit/secrets.toml. Bez klucza panel statystyk jest wyłączony dla wszystkich.
+    key = os.environ.get("QUIZ_INSTRUCTOR_KEY")
+    if key:
+        return key
+    try:
+        return st.secrets.get("instructor_key")
+    except FileNotFoundError:
+        # Brak pliku secrets.toml
+        return None
+
+def is_instructor():
+    # Sprawdzane raz na sesję; klucz jest od razu usuwany z paska adresu
+    if 'instructor' not in st.session_state:
+        given = st.query_params.get(INSTRUCTOR_PARAM)
+        if given is not None:
+            del st.query_params[INSTRUCTOR_PARAM]
+        key = instructor_key()
+        st.session_state.instructor = bool(key and given and hmac.compare_digest(given.encode(), str(key).encode()))
+    return st.session_state.instructor
+
+def show_timings():
+    # Widoczne tylko z QUIZ_TIMINGS=1; bufor jest wspólny dla wszystkich sesji procesu
+    with st.sidebar.expander("⏱️ Pomiary czasów"):
+        st.dataframe(TIMINGS.summary(), hide_index=True, use_container_width=True)
+        st.download_button("Pobierz (JSON lines)", TIMINGS.to_jsonl(), file_name="timings.jsonl",
+                           mime="application/x-ndjson", use_container_width=True)
+
 def show_main_menu(quiz_logic):
     # Kontener główny - Karta
     st.markdown('<div class="stCard">', unsafe_allow_html=True)
@@ -178,15 +598,64 @@ def show_main_menu(quiz_logic):
     with col2:
         st.success("🎲 **Szybki Losowy**\n\nWylosuj określoną liczbę pytań na rozgrzewkę.")
         with st.form("random_quiz_form", border=False):
-            num = st.number_input("Liczba pytań", min_value=1, max_value=len(quiz_logic.questions), value=10, step=1, label_visibility="collapsed")
+            num = st.number_input("Liczba pytań", min_value=1, max_value=len(quiz_logic), value=10, step=1, label_visibility="collapsed")
             if st.form_submit_button("Start Losowy", use_container_width=True):
                 start_quiz(quiz_logic, num_questions=num)
                 st.rerun()
 
     st.markdown('</div>', unsafe_allow_html=True)
+
+    # Karta wyszukiwania - quiz tylko z pytań na wybrany temat
+    st.markdown('<div class="stCard">', unsafe_allow_html=True)
+    st.subheader("🔍 Quiz tematyczny")
+    query = st.text_input("Szukaj w pytaniach i odpowiedziach", key="search_query",
+                          placeholder="np. zażalenie, apelacja, kurator")
+    if query.strip():
+        matches = quiz_logic.search_pool(query)
+        st.write(f"Pasujące pytania: **{len(matches)}**")
+        if matches:
+            with st.expander("Podgląd"):
+                for n in matches[:5]:
+                    st.markdown(f"- {quiz_logic.prepared(n).text}")
+            if st.button("Rozpocznij quiz z wyników wyszukiwania", use_container_width=True, type="primary"):
+                start_quiz(quiz_logic, search_query=query)
+                st.rerun()
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    # Karta egzaminu - na czas, ocena całego arkusza po oddaniu
+    st.markdown('<div class="stCard">', unsafe_allow_html=True)
+    st.subheader("⏱️ Egzamin")
+    st.write("Odpowiedz na wszystkie pytania, a wynik zobaczysz dopiero po oddaniu arkusza.")
+    with st.form("exam_start_form", border=False):
+        col1, col2 = st.columns(2)
+        exam_questions = col1.number_input("Liczba pytań", min_value=1, max_value=len(quiz_logic),
+                                           value=min(EXAM_DEFAULT_QUESTIONS, len(quiz_logic)), step=1)
+        exam_minutes = col2.number_input("Czas (minuty)", min_value=1, max_value=600,
+                                         value=EXAM_DEFAULT_MINUTES, step=5)
+        col1, col2 = st.columns(2)
+        exam_rule = col1.selectbox("Ocenianie", list(SCORING_RULES), index=list(SCORING_RULES).index(DEFAULT_RULE),
+                                   format_func=EXAM_RULE_LABELS.get)
+        exam_late_policy = col2.selectbox("Oddanie po czasie", list(LATE_POLICIES),
+                                          index=list(LATE_POLICIES).index(DEFAULT_LATE_POLICY),
+                                          format_func=EXAM_LATE_LABELS.get)
+        if st.form_submit_button("Rozpocznij egzamin", use_container_width=True):
+            start_exam(quiz_logic, exam_questions, exam_minutes, exam_rule, exam_late_policy)
+            st.rerun()
+    st.markdown('</div>', unsafe_allow_html=True)
     
+    # Karta "Na dziś" (powtórki rozłożone w czasie, tylko jeśli coś jest zaplanowane)
+    due_count = len(st.session_state.due_queue)
+    if due_count > 0:
+        st.markdown('<div class="stCard" style="border-left: 5px solid #10B981;">', unsafe_allow_html=True)
+        st.subheader("📅 Na dziś")
+        st.write(f"Masz **{due_count}** pytań zaplanowanych do powtórki na dziś.")
+        if st.button(f"Powtórz zaplanowane (do {DUE_SESSION_SIZE})", use_container_width=True, type="secondary"):
+            start_quiz(quiz_logic, due_only=True)
+            st.rerun()
+        st.markdown('</div>', unsafe_allow_html=True)
+
     # Karta powtórek (tylko jeśli są błędy)
-    review_count = len(st.session_state.get('incorrect_ids', set()))
+    review_count = bitmap_count(st.session_state.incorrect_bitmap)
     if review_count > 0:
         st.markdown('<div class="stCard" style="border-left: 5px solid #F59E0B;">', unsafe_allow_html=True)
         st.subheader("🔁 Powtórki")
@@ -197,93 +666,103 @@ def show_main_menu(quiz_logic):
         st.markdown('</div>', unsafe_allow_html=True)
 
 
-def show_question_screen():
-    q_list = st.session_state.questions_to_ask
+def show_question_screen(quiz_logic):
+    q_list = st.session_state.question_order
     index = st.session_state.current_question_index
-    q = q_list[index]
+    q = quiz_logic.prepared(q_list[index])
     
-    # Custom Question Card
+    # Custom Question Card - statyczna część, rysowana raz na pytanie (pełny rerun tylko przy zmianie pytania)
     st.markdown(f"""
     <div class="stCard">
         <h3 style="margin-top: 0;">Pytanie {index + 1}</h3>
-        <p style="font-size: 1.2rem; font-weight: 500; color: #1E293B;">{q['text']}</p>
+        <p style="font-size: 1.2rem; font-weight: 500; color: #1E293B;">{q.text}</p>
     </div>
     """, unsafe_allow_html=True)
     
-    # Options
-    options = {f"{key}) {value}": key for key, value in sorted(q["options"].items())}
-    
     st.markdown("##### Wybierz odpowiedź:")
-    user_selection_keys = []
+    answer_area(quiz_logic, q, is_last=index + 1 >= len(q_list))
+
+
+def submit_answer():
+    st.session_state.answer_submitted = True
+
+# Fragment: zaznaczenie opcji i "Sprawdź odpowiedź" przerysowują tylko ten obszar,
+# bez CSS, paska bocznego i karty pytania. Wynik w pasku bocznym odświeża się przy następnym pytaniu.
+@st.fragment
+def answer_area(quiz_logic, q, is_last):
+    # Przebiegi samego fragmentu (zaznaczenie, sprawdzenie) omijają etapy z części głównej skryptu,
+    # więc są mierzone tutaj - razem z ocenianiem i zapisem odpowiedzi
+    with TIMINGS.stage("answer_area"):
+        user_selection_keys = []
     
-    # Używamy kontenera, aby opcje były ładnie zgrupowane
-    with st.container():
-        for label, key in options.items():
-            # Checkbox jest trudny do ostylowania w CSS Streamlit, ale standardowy wygląda OK z customowym fontem
-            if st.checkbox(label, key=f"cb_{key}_{q['id']}", disabled=st.session_state.answer_submitted):
-                user_selection_keys.append(key)
+        # Używamy kontenera, aby opcje były ładnie zgrupowane
+        with st.container():
+            for label, key in zip(q.option_texts, q.labels):
+                # Checkbox jest trudny do ostylowania w CSS Streamlit, ale standardowy wygląda OK z customowym fontem
+                if st.checkbox(label, key=f"cb_{key}_{q.id}", disabled=st.session_state.answer_submitted):
+                    user_selection_keys.append(key)
     
-    st.session_state.user_selection = user_selection_keys
+        st.session_state.user_selection = user_selection_keys
     
-    st.divider()
-
-    col1, col2 = st.columns([1, 2])
-    with col1:
-        if not st.session_state.answer_submitted:
-            if st.button("Sprawdź odpowiedź", use_container_width=True, type="primary"):
-                st.session_state.answer_submitted = True
-                st.rerun()
-        else:
-            if st.button("Następne pytanie ➡️", use_container_width=True, type="primary"):
-                if index + 1 < len(q_list):
-                    st.session_state.current_question_index += 1
-                    st.session_state.answer_submitted = False
-                    st.session_state.score_calculated = False
-                    st.rerun()
-                else:
-                    st.session_state.screen = 'summary'
-                    st.rerun()
-
-    # Logika sprawdzania (naliczanie punktów)
-    if st.session_state.answer_submitted and not st.session_state.score_calculated:
-        user_answers = set(st.session_state.user_selection)
-        correct_answers = set(q["correct_answers"])
-        
-        if user_answers == correct_answers:
-            st.session_state.score += 1
-            st.session_state.incorrect_ids.discard(q["id"])
-        else:
-            if q["id"] not in st.session_state.incorrect_ids:
+        st.divider()
+
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            if not st.session_state.answer_submitted:
+                # Callback zmienia stan przed przerysowaniem fragmentu, więc nie trzeba drugiego reruna
+                st.button("Sprawdź odpowiedź", use_container_width=True, type="primary", on_click=submit_answer)
+            else:
+                if st.button("Następne pytanie ➡️", use_container_width=True, type="primary"):
+                    # Nowe pytanie - pełny rerun całej strony
+                    if not is_last:
+                        st.session_state.current_question_index += 1
+                        st.session_state.answer_submitted = False
+                        st.session_state.score_calculated = False
+                        save_progress()
+                        st.rerun()
+                    else:
+                        st.session_state.screen = 'summary'
+                        save_progress()
+                        st.rerun()
+
+        # Logika sprawdzania (naliczanie punktów)
+        is_correct = quiz_logic.is_correct(q, st.session_state.user_selection)
+        if st.session_state.answer_submitted and not st.session_state.score_calculated:
+            if is_correct:
+                st.session_state.score += 1
+            elif not bitmap_get(st.session_state.incorrect_bitmap, q.index):
                 st.session_state.newly_incorrect_count += 1
-            st.session_state.incorrect_ids.add(q["id"])
+            bitmap_set(st.session_state.incorrect_bitmap, q.index, not is_correct)
+            # Do dziennika odpowiedzi trafiają też zaznaczone opcje (statystyki dla prowadzącego)
+            get_progress_store(PROGRESS_DB).record_answer(
+                st.session_state.user_id, q.id, is_correct, st.session_state.user_selection
+            )
+            st.session_state.due_queue.review(q.id, is_correct, time.time())
         
-        st.session_state.score_calculated = True
+            st.session_state.score_calculated = True
 
-    # Wyświetlanie feedbacku
-    if st.session_state.answer_submitted:
-        user_answers = set(st.session_state.user_selection)
-        correct_answers = set(q["correct_answers"])
+        # Wyświetlanie feedbacku
+        if st.session_state.answer_submitted:
+            # Mapa liter na pełne treści
+            correct_option_texts = [text for key, text in zip(q.labels, q.option_texts) if key in q.correct]
         
-        # Mapa liter na pełne treści
-        correct_option_texts = [f"{k}) {q['options'][k]}" for k in sorted(correct_answers)]
+            st.markdown("<br>", unsafe_allow_html=True) # Spacer
         
-        st.markdown("<br>", unsafe_allow_html=True) # Spacer
-        
-        if user_answers == correct_answers:
-            st.success("✅ **Świetnie!** To jest poprawna odpowiedź.")
-        else:
-            st.error(f"❌ **Błąd.** Prawidłowa odpowiedź to:")
-            for txt in correct_option_texts:
-                st.markdown(f"- {txt}")
+            if is_correct:
+                st.success("✅ **Świetnie!** To jest poprawna odpowiedź.")
+            else:
+                st.error(f"❌ **Błąd.** Prawidłowa odpowiedź to:")
+                for txt in correct_option_texts:
+                    st.markdown(f"- {txt}")
 
 
-def show_summary_screen():
+def show_summary_screen(quiz_logic):
     st.balloons()
     
     st.markdown('<div class="stCard" style="text-align: center;">', unsafe_allow_html=True)
     st.title("🎉 Koniec Quizu")
     
-    total = len(st.session_state.questions_to_ask)
+    total = len(st.session_state.question_order)
     score = st.session_state.score
     percentage = (score / total) * 100 if total > 0 else 0
     
@@ -298,36 +777,187 @@ def show_summary_screen():
     with col1:
         if st.button("🏠 Wróć do menu", use_container_width=True):
             st.session_state.screen = 'menu'
+            save_progress()
             st.rerun()
     with col2:
         if st.session_state.newly_incorrect_count > 0:
             if st.button("🔄 Powtórz błędne z tej sesji", use_container_width=True, type="primary"):
-                 # Logika: ustawiamy incorrect_ids jako subset tego co było błędne teraz
-                 # Ale w obecnej logice incorrect_ids trzyma wszystkie globalnie błędne "dla usera"
+                 # Logika: ustawiamy incorrect_bitmap jako subset tego co było błędne teraz
+                 # Ale w obecnej logice incorrect_bitmap trzyma wszystkie globalnie błędne "dla usera"
                  # Po prostu uruchamiamy review_only
-                 start_quiz(quiz_logic=st.session_state.get('quiz_logic_ref'), review_only=True)
+                 start_quiz(quiz_logic, review_only=True)
                  st.rerun()
 
 
+# Fragment: licznik czasu odświeża się sam, bez przebiegu całego arkusza i bez wysyłania formularza
+@st.fragment(run_every=EXAM_TIMER_REFRESH)
+def exam_timer():
+    deadline = st.session_state.exam_deadline
+    remaining = deadline - time.time()
+    if remaining > 0:
+        st.info(f"⏳ Pozostało ok. {math.ceil(remaining / 60)} min (koniec o {time.strftime('%H:%M', time.localtime(deadline))}).")
+    elif remaining > -LATE_GRACE:
+        # Jeszcze w czasie na spóźnione kliknięcie (exam.LATE_GRACE)
+        st.error("⌛ Czas minął - oddaj arkusz teraz.")
+    else:
+        st.error(f"⌛ Czas minął. {EXAM_LATE_LABELS[st.session_state.exam_late_policy]}.")
+
+def show_exam_screen(quiz_logic):
+    order = st.session_state.exam_order
+    exam_id = st.session_state.exam_id
+    st.title("⏱️ Egzamin")
+    exam_timer()
+
+    # Formularz: zaznaczanie odpowiedzi nie uruchamia skryptu, cały arkusz trafia na serwer przy oddaniu
+    with st.form("exam_form"):
+        for i, n in enumerate(order):
+            q = quiz_logic.prepared(n)
+            st.markdown(f"**{i + 1}.** {q.text}")
+            for bit, label in enumerate(q.option_texts):
+                st.checkbox(label, key=f"ex_{exam_id}_{i}_{bit}")
+            st.markdown("<br>", unsafe_allow_html=True) # Spacer
+        st.form_submit_button("Oddaj arkusz", use_container_width=True, type="primary",
+                              on_click=grade_exam, args=(quiz_logic,))
+
+def show_exam_result_screen(quiz_logic):
+    result = st.session_state.exam_result
+    scores = result["scores"]
+    selected = result["selected"].tolist()
+    total = len(selected)
+    elapsed = result["submitted_at"] - st.session_state.exam_started
+    late = math.ceil((result["submitted_at"] - st.session_state.exam_deadline) / 60)
+    if scores is None:
+        # Arkusz odrzucony za spóźnienie: bez wyniku i bez podglądu poprawnych odpowiedzi
+        st.markdown('<div class="stCard" style="text-align: center;">', unsafe_allow_html=True)
+        st.title("📝 Wynik egzaminu")
+        st.error(f"Arkusz oddano po czasie (o {late} min) i nie został przyjęty.")
+        st.markdown('</div>', unsafe_allow_html=True)
+        if st.button("🏠 Wróć do menu", use_container_width=True):
+            st.session_state.screen = 'menu'
+            st.rerun()
+        return
+
+    points = float(scores.sum())
+    fully_correct = int(np.count_nonzero(result["selected"] == st.session_state.exam_correct))
+
+    st.markdown('<div class="stCard" style="text-align: center;">', unsafe_allow_html=True)
+    st.title("📝 Wynik egzaminu")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Punkty", f"{round(points, 2):g}/{total}")
+    col2.metric("Wynik", f"{100 * points / total:.1f}%" if total else "—")
+    col3.metric("Bezbłędne", f"{fully_correct}/{total}")
+    col4.metric("Czas", f"{int(elapsed // 60)}:{int(elapsed % 60):02d}")
+    st.caption(f"Ocenianie: {EXAM_RULE_LABELS[st.session_state.exam_rule]}")
+    st.markdown('</div>', unsafe_allow_html=True)
+    if result["late"]:
+        st.warning(f"Arkusz oddano po czasie (o {late} min) - wszystkie pytania ocenione na 0 punktów.")
+
+    with st.expander("Odpowiedzi pytanie po pytaniu"):
+        rows = []
+        for i, (n, mask, score) in enumerate(zip(st.session_state.exam_order, selected, scores.tolist())):
+            q = quiz_logic.prepared(n)
+            rows.append({
+                "Nr": i + 1,
+                "Pytanie": q.text,
+                "Twoja odpowiedź": ", ".join(key for bit, key in enumerate(q.labels) if mask >> bit & 1) or "—",
+                "Poprawna": ", ".join(sorted(q.correct)),
+                "Punkty": round(score, 2),
+            })
+        st.dataframe(rows, hide_index=True, use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("🏠 Wróć do menu", use_container_width=True):
+            st.session_state.screen = 'menu'
+            st.rerun()
+    with col2:
+        if fully_correct < total:
+            if st.button("🔄 Powtórz błędne", use_container_width=True, type="primary"):
+                start_quiz(quiz_logic, review_only=True)
+                st.rerun()
+
+def show_instructor_screen(quiz_logic):
+    # Panel prowadzącego: same zagregowane liczniki ze stanu na ostatnie kompaktowanie dziennika,
+    # więc koszt nie rośnie z liczbą zapisanych odpowiedzi
+    store = get_progress_store(PROGRESS_DB)
+
+    st.markdown('<div class="stCard">', unsafe_allow_html=True)
+    st.title("📊 Statystyki pytań")
+    answers, answered, compacted_at = store.stats_overview()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Odpowiedzi", answers)
+    col2.metric("Pytania z odpowiedziami", answered)
+    col3.metric("Stan na", time.strftime("%H:%M:%S", time.localtime(compacted_at)) if compacted_at else "—")
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    st.subheader(f"Najtrudniejsze pytania (do {INSTRUCTOR_TOP})")
+    rows = []
+    for question_id, attempts, errors, picks in store.hardest_questions(INSTRUCTOR_TOP):
+        n = quiz_logic.index_of(question_id)
+        if n is None:
+            # Pytania nie ma już w bazie
+            continue
+        q = quiz_logic.prepared(n)
+        # Najczęściej zaznaczana błędna opcja; przy remisie wcześniejsza litera
+        wrong = sorted((-count, label) for label, count in picks.items() if label in q.options and label not in q.correct)
+        rows.append({
+            "Pytanie": q.text,
+            "Próby": attempts,
+            "Błędne (%)": round(100 * errors / attempts, 1),
+            "Najczęstsza błędna odpowiedź": f"{wrong[0][1]}) {q.options[wrong[0][1]]} ({-wrong[0][0]}×)" if wrong else "—",
+        })
+    if rows:
+        st.dataframe(rows, hide_index=True, use_container_width=True)
+    else:
+        st.info("Brak odpowiedzi w statystykach. Liczniki są przeliczane co kilkadziesiąt sekund.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("🏠 Wróć do menu", use_container_width=True):
+            st.session_state.screen = 'menu'
+            st.rerun()
+    with col2:
+        # Dołącza odpowiedzi zapisane od ostatniego kompaktowania, bez czekania na harmonogram
+        if st.button("🔄 Przelicz teraz", use_container_width=True, type="primary"):
+            store.compact_stats()
+            st.rerun()
+
+
 # --- Main ---
 st.set_page_config(page_title="Postępowanie w sprawach nieletnich - Quiz", page_icon="🎓", layout="wide")
 
-questions_data, error_message = load_questions_from_local_file(LOCAL_QUESTIONS_FILE)
+# Czasy etapów każdego przebiegu skryptu trafiają do TIMINGS (tylko z QUIZ_TIMINGS=1)
+with TIMINGS.stage("load"):
+    quiz_logic, error_message = pin_quiz_logic(get_bank_registry(LOCAL_QUESTIONS_BANK, LOCAL_QUESTIONS_FILE))
 
 if error_message:
     st.error(error_message)
     st.stop()
 
-initialize_session_state()
-quiz_logic = QuizLogic(questions_list=questions_data)
-# Hack, żeby mieć dostęp do quiz_logic w przyciskach wewnątrz funkcji
-st.session_state.quiz_logic_ref = quiz_logic 
+with TIMINGS.stage("session_init"):
+    initialize_session_state(quiz_logic, get_progress_store(PROGRESS_DB))
+    # Już przy pierwszym przebiegu: klucz prowadzącego znika z adresu, zanim ktoś go skopiuje
+    is_instructor()
 
 sidebar_status()
+if TIMINGS.enabled:
+    show_timings()
 
 if st.session_state.screen == 'menu':
-    show_main_menu(quiz_logic)
+    with TIMINGS.stage("show_main_menu"):
+        show_main_menu(quiz_logic)
 elif st.session_state.screen == 'quiz':
-    show_question_screen()
+    with TIMINGS.stage("show_question_screen"):
+        show_question_screen(quiz_logic)
 elif st.session_state.screen == 'summary':
-    show_summary_screen()
+    with TIMINGS.stage("show_summary_screen"):
+        show_summary_screen(quiz_logic)
+elif st.session_state.screen == 'exam':
+    with TIMINGS.stage("show_exam_screen"):
+        show_exam_screen(quiz_logic)
+elif st.session_state.screen == 'exam_result':
+    with TIMINGS.stage("show_exam_result_screen"):
+        show_exam_result_screen(quiz_logic)
+elif st.session_state.screen == 'instructor' and is_instructor():
+    with TIMINGS.stage("show_instructor_screen"):
+        show_instructor_screen(quiz_logic)
@@ -0,0 +1,76 @@
+"""
+HighlightIndex against the plain scan over every highlight rect it replaced: for random
+rect sets (including zero and negative heights and widths) and random line boxes,
+overlaps() and overlaps_many() must say exactly what the scan says.
+"""
+import os
+import random
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from extract_questions import HighlightIndex  # noqa: E402
+
+def overlaps_scan(bbox, highlights):
+    # The all-rects intersection test extract_questions used before the index
+    x0, top, x1, bottom = bbox
+    for h_rect in highlights:
+        i_x0 = max(x0, h_rect['x0'])
+        i_top = max(top, h_rect['top'])
+        i_x1 = min(x1, h_rect['x1'])
+        i_bottom = min(bottom, h_rect['bottom'])
+        if i_x1 > i_x0 and i_bottom > i_top:
+            return True
+    return False
+
+def random_rects(rnd, count):
+    rects = []
+    for _ in range(count):
+        x0, top = rnd.uniform(0, 600), rnd.uniform(0, 800)
+        # Mostly line-sized rects, some degenerate (zero) or inverted (negative) ones
+        width = rnd.choice([0.0, -rnd.uniform(0, 50), rnd.uniform(0, 300)])
+        height = rnd.choice([0.0, -rnd.uniform(0, 20), rnd.uniform(0, 20), rnd.uniform(0, 200)])
+        rects.append({'x0': x0, 'x1': x0 + width, 'top': top, 'bottom': top + height})
+    return rects
+
+def random_boxes(rnd, count):
+    boxes = []
+    for _ in range(count):
+        x0, top = rnd.uniform(-10, 600), rnd.uniform(-10, 800)
+        boxes.append((x0, top, x0 + rnd.uniform(0, 400), top + rnd.choice([0.0, rnd.uniform(0, 15)])))
+    return boxes
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("count", [0, 1, 5, 50, 500])
+def test_matches_scan(seed, count):
+    rnd = random.Random(seed * 1000 + count)
+    rects = random_rects(rnd, count)
+    boxes = random_boxes(rnd, 200)
+    # Lines exactly on rect edges, where > versus >= matters
+    for r in rects[:20]:
+        boxes.append((r['x0'], r['bottom'], r['x0'] + 10, r['bottom'] + 10))
+        boxes.append((r['x0'] - 10, r['top'] - 10, r['x0'], r['top']))
+    index = HighlightIndex(rects)
+
+    expected = [overlaps_scan(box, rects) for box in boxes]
+    assert [index.overlaps(box) for box in boxes] == expected
+    assert index.overlaps_many(np.array(boxes)).tolist() == expected
+
+def test_empty():
+    index = HighlightIndex([])
+    assert not index.overlaps((0, 0, 100, 10))
+    assert index.overlaps_many(np.array([(0, 0, 100, 10)])).tolist() == [False]
+    assert index.overlaps_many(np.empty((0, 4))).tolist() == []
+
+def test_only_degenerate_rects():
+    rects = [
+        {'x0': 0, 'x1': 100, 'top': 10, 'bottom': 10},
+        {'x0': 0, 'x1': 100, 'top': 20, 'bottom': 15},
+    ]
+    index = HighlightIndex(rects)
+    boxes = [(0, 5, 100, 25), (10, 12, 50, 18)]
+    assert [index.overlaps(box) for box in boxes] == [False, False]
+    assert index.overlaps_many(np.array(boxes)).tolist() == [False, False]
@@ -0,0 +1,129 @@
+"""
+Opt-in stage timings, kept in a fixed-size in-memory ring buffer.
+
+Off by default; set QUIZ_TIMINGS=1 in the environment (or call TIMINGS.enable()) to record.
+While disabled, stage() hands out one shared no-op context manager, so instrumented code
+pays for little more than the call. Records can be exported as JSON lines or summarized
+per stage.
+
+    with TIMINGS.stage("extract_words", page=3):
+        words = page.extract_words()
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+DEFAULT_CAPACITY = 10000
+
+_NULL_STAGE = nullcontext()
+
+class _Stage:
+    __slots__ = ("_recorder", "_name", "_labels", "_start")
+
+    def __init__(self, recorder, name, labels):
+        self._recorder = recorder
+        self._name = name
+        self._labels = labels
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        # Also recorded when the block raises (st.rerun() and st.stop() do)
+        self._recorder.record(self._name, time.perf_counter() - self._start, self._labels)
+        return False
+
+class TimingRecorder:
+    def __init__(self, capacity=DEFAULT_CAPACITY, enabled=False):
+        self.enabled = enabled
+        # The oldest records fall out once the buffer is full
+        self._buffer = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def stage(self, name, **labels):
+        """Context manager timing one stage; labels (page, screen, ...) are stored with the record."""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name, labels)
+
+    def record(self, name, seconds, labels=None):
+        with self._lock:
+            self._buffer.append((time.time(), name, seconds, labels or {}))
+
+    def extend(self, records):
+        """Add records drained from another process (e.g. an extraction worker)."""
+        with self._lock:
+            self._buffer.extend(records)
+
+    def drain(self):
+        """Return the buffered records and empty the buffer."""
+        with self._lock:
+            records = list(self._buffer)
+            self._buffer.clear()
+        return records
+
+    def records(self):
+        with self._lock:
+            return list(self._buffer)
+
+    def clear(self):
+        with self._lock:
+            self._buffer.clear()
+
+    # --- Export ---
+
+    def to_jsonl(self):
+        """One JSON object per record: wall-clock time, stage, milliseconds and the labels."""
+        return "".join(
+            json.dumps({"ts": round(ts, 6), "stage": name, "ms": round(seconds * 1000, 3), **labels},
+                       ensure_ascii=False) + "\n"
+            for ts, name, seconds, labels in self.records()
+        )
+
+    def write_jsonl(self, path):
+        with open(path, "w", encoding='utf-8') as f:
+            f.write(self.to_jsonl())
+
+    def summary(self):
+        """Per-stage count, total, mean, p50, p95 and max in milliseconds, slowest total first."""
+        by_stage = {}
+        for _, name, seconds, _ in self.records():
+            by_stage.setdefault(name, []).append(seconds * 1000)
+        rows = []
+        for name, values in by_stage.items():
+            values.sort()
+            rows.append({
+                "stage": name,
+                "count": len(values),
+                "total_ms": round(sum(values), 3),
+                "mean_ms": round(sum(values) / len(values), 3),
+                "p50_ms": round(values[(len(values) - 1) // 2], 3),
+                "p95_ms": round(values[-(-len(values) * 95 // 100) - 1], 3),
+                "max_ms": round(values[-1], 3),
+            })
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def format_summary(self):
+        rows = self.summary()
+        if not rows:
+            return "No timings recorded."
+        width = max(len("stage"), *(len(row["stage"]) for row in rows))
+        columns = ("count", "total_ms", "mean_ms", "p50_ms", "p95_ms", "max_ms")
+        lines = [f"{'stage':<{width}}" + "".join(f"{c:>11}" for c in columns)]
+        for row in rows:
+            lines.append(f"{row['stage']:<{width}}{row['count']:>11}"
+                         + "".join(f"{row[c]:>11.3f}" for c in columns[1:]))
+        return "\n".join(lines)
+
+# One recorder per process, shared by the extractor and every session of the app
+TIMINGS = TimingRecorder(enabled=os.environ.get("QUIZ_TIMINGS") == "1")